@@ -1,42 +1,522 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Query, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials  
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReadPreference, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
 import os
+import fcntl
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from typing import List, Dict, Optional, Union, Any, Hashable, Callable, Awaitable, Tuple
+from collections import OrderedDict, deque
+from itertools import combinations, islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+from email.utils import format_datetime, parsedate_to_datetime
 import uuid
+import time
+import socket
+import ipaddress
+import hashlib
+import asyncio
+import threading
+import multiprocessing
+import bisect
 from datetime import datetime, timezone, timedelta
 import bcrypt
 import jwt
 from jose import JWTError
 import json
 import base64
+import csv
+import io
+import numpy as np
+import re
+import unicodedata
+import zlib
+import brotli
+import orjson
+import redis
+import redis.asyncio as aioredis
+import certifi
+import urllib3
+from PIL import Image, ImageOps
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics, exposed in the Prometheus text format at /metrics
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS = []
+
+def _label_text(names, values) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+class Counter:
+    """Counter/gauge keyed by label values. ``collect`` reads values at scrape time instead."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), collect=None):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.collect = collect
+        self._values = {}
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        values = self.collect() if self.collect else dict(self._values)
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, value in values.items():
+            lines.append(f"{self.name}{_label_text(self.labels, label_values)} {value}")
+        return lines
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = [(labels, list(entry[0]), entry[1], entry[2]) for labels, entry in self._values.items()]
+        for label_values, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _label_text(self.labels + ("le",), label_values + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class LatencyStats:
+    """Call counter plus percentiles over the most recent samples (seconds)."""
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def percentile(self, fraction: float) -> float:
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+def render_metrics() -> bytes:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+http_requests = Counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests being served")
+mongodb_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ("collection", "command")
+)
+mongodb_command_failures = Counter("mongodb_command_failures_total", "Failed MongoDB commands", ("collection", "command"))
+bcrypt_wait = Histogram("bcrypt_pool_wait_seconds", "Time bcrypt calls wait for a pool thread")
+
+# Recent command latencies for the readiness probe
+mongodb_recent_latency = LatencyStats()
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    # pymongo calls these from Motor's worker threads
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else event.command.get("collection", "none")
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "none")
+        mongodb_command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+        mongodb_recent_latency.observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "none")
+        mongodb_command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+        mongodb_command_failures.inc(collection, event.command_name)
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool occupancy, summed over every server in the topology."""
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+        self.checkout_wait = LatencyStats()
+        self._lock = threading.Lock()
+        # Checkout start and end events are emitted on the same thread
+        self._local = threading.local()
+
+    def _add(self, attribute: str, amount: int):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + amount)
+
+    def connection_created(self, event):
+        self._add("open", 1)
+
+    def connection_closed(self, event):
+        self._add("open", -1)
+
+    def _waited(self):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            self.checkout_wait.observe(time.perf_counter() - started)
+            self._local.started = None
+
+    def connection_checked_out(self, event):
+        self._add("checked_out", 1)
+        self._waited()
+
+    def connection_checked_in(self, event):
+        self._add("checked_out", -1)
+
+    def connection_check_out_failed(self, event):
+        self._add("checkout_failures", 1)
+        self._waited()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def stats(self, max_size: int) -> dict:
+        return {
+            "open": self.open,
+            "checked_out": self.checked_out,
+            "max_size": max_size,
+            "saturation": round(self.checked_out / max_size, 3) if max_size else None,
+            "checkout_failures": self.checkout_failures,
+            "checkout_wait": self.checkout_wait.summary(),
+        }
+
+mongodb_pool = MongoPoolMetrics()
+Gauge("mongodb_pool_connections", "Open MongoDB connections", collect=lambda: {(): mongodb_pool.open})
+Gauge("mongodb_pool_checked_out", "MongoDB connections in use", collect=lambda: {(): mongodb_pool.checked_out})
+Counter("mongodb_pool_checkout_failures_total", "Failed connection checkouts",
+        collect=lambda: {(): mongodb_pool.checkout_failures})
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            # Route templates (set by FastAPI on match) keep label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], path)
+            http_requests.inc(scope["method"], path, str(status_code))
+
+# MongoDB connection settings (per process: size the pool per worker)
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '0'))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '0'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '30000'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '20000'))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '0'))
+# Negotiated with the server in order; zstd needs the zstandard package, snappy python-snappy
+MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', 'zstd,zlib')
+# Public catalog reads (listings, categories) may be served by secondaries
+MONGO_CATALOG_READ_PREFERENCE = os.environ.get('MONGO_CATALOG_READ_PREFERENCE', 'secondaryPreferred')
+# ...except for this long after a write this process knows of, when they go to the primary
+MONGO_PRIMARY_AFTER_WRITE_SECONDS = float(os.environ.get('MONGO_PRIMARY_AFTER_WRITE_SECONDS', '5'))
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+def mongo_client_options() -> dict:
+    # 0 keeps the driver default (no limit) for the optional timeouts
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS or None,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS or None,
+    }
+    compressors = [name.strip() for name in MONGO_COMPRESSORS.split(",") if name.strip()]
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMetrics(), mongodb_pool], **mongo_client_options())
+# Auth and writes always go to the primary through `db`
 db = client[os.environ['DB_NAME']]
+# Listings and categories may be read from secondaries (see catalog_reader)
+catalog_db = client.get_database(
+    os.environ['DB_NAME'],
+    read_preference=READ_PREFERENCES[MONGO_CATALOG_READ_PREFERENCE]
+)
 
 # JWT Settings
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'ofertas-do-pit-secret-key-2024')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 
+# Password hashing pool: bcrypt releases the GIL, so threads keep it off the event loop
+BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', '2'))
+BCRYPT_MAX_QUEUE = int(os.environ.get('BCRYPT_MAX_QUEUE', '64'))
+
+# Response cache settings
+CACHE_TTL_SECONDS = float(os.environ.get('CACHE_TTL_SECONDS', '30'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '1024'))
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '500'))
+READINESS_TIMEOUT_SECONDS = float(os.environ.get('READINESS_TIMEOUT_SECONDS', '1'))
+READINESS_CACHE_SECONDS = float(os.environ.get('READINESS_CACHE_SECONDS', '2'))
+AUTH_CACHE_TTL_SECONDS = float(os.environ.get('AUTH_CACHE_TTL_SECONDS', '60'))
+AUTH_CACHE_MAX_ENTRIES = int(os.environ.get('AUTH_CACHE_MAX_ENTRIES', '1024'))
+
+# Cache tier shared by workers: "memory" (per process) or "redis"
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'ofertas')
+
+# Opt-in orjson serialization for every response (FAST_JSON=true)
+FAST_JSON = os.environ.get('FAST_JSON', 'false').lower() in ('1', 'true', 'yes')
+
+def _orjson_default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    return jsonable_encoder(obj)
+
+def render_json(data: Any, plain: bool = False) -> bytes:
+    # plain: data is already made of JSON types only, so jsonable_encoder can be skipped
+    if FAST_JSON:
+        # orjson handles datetimes (dataPostagem, created_at) natively; Z matches pydantic's UTC format
+        return orjson.dumps(data, default=_orjson_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    # Same encoding FastAPI's JSONResponse applies to route return values
+    return json.dumps(
+        data if plain else jsonable_encoder(data),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
+
 # Create the main app without a prefix
-app = FastAPI(title="Ofertas do PIT API", version="1.0.0")
+app = FastAPI(
+    title="Ofertas do PIT API",
+    version="1.0.0",
+    default_response_class=FastJSONResponse if FAST_JSON else JSONResponse
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
 
-# Pydantic Models
+# Sorting options for the promotion listing; "id" is the tiebreaker that makes
+# the order total, which keyset pagination relies on
+SORT_OPTIONS = {
+    "data_recente": [("dataPostagem", -1), ("id", -1)],
+    "maior_desconto": [("percentualDesconto", -1), ("id", -1)],
+    "menor_desconto": [("percentualDesconto", 1), ("id", 1)],
+    "maior_preco": [("precoOferta", -1), ("id", -1)],
+    "menor_preco": [("precoOferta", 1), ("id", 1)]
+}
+CARD_FIELDS = ["id", "titulo", "imagemProduto", "miniaturas", "precoOriginal", "precoOferta", "percentualDesconto", "categoria_id"]
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Search: every word filters, but only the first few decide relevance, since the
+# ranking query grows with 2^words
+SEARCH_MAX_QUERY_LENGTH = 100
+SEARCH_RANKED_TERMS = 4
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', '500'))
+STATS_REFRESH_SECONDS = float(os.environ.get('STATS_REFRESH_SECONDS', '300'))
+STATS_DEBOUNCE_SECONDS = float(os.environ.get('STATS_DEBOUNCE_SECONDS', '2'))
+PRICE_BUCKETS = [0, 50, 100, 200, 500, 1000, 2000, 5000]
+EXPIRY_INTERVAL_SECONDS = float(os.environ.get('EXPIRY_INTERVAL_SECONDS', '60'))
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get('ARCHIVE_INTERVAL_SECONDS', '3600'))
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '30'))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '1000'))
+EVENTS_BUFFER_SIZE = int(os.environ.get('EVENTS_BUFFER_SIZE', '1000'))
+EVENTS_KEEPALIVE_SECONDS = float(os.environ.get('EVENTS_KEEPALIVE_SECONDS', '15'))
+# With a replica set, feed the push channel from a change stream instead of the
+# write routes, so writes made through every worker reach every subscriber
+PROMOCOES_CHANGE_STREAM = os.environ.get('PROMOCOES_CHANGE_STREAM', 'false').lower() in ('1', 'true', 'yes')
+BULK_MAX_ROWS = int(os.environ.get('BULK_MAX_ROWS', '50000'))
+BULK_INSERT_CHUNK_SIZE = int(os.environ.get('BULK_INSERT_CHUNK_SIZE', '1000'))
+# Static catalog snapshot for CDN/edge hosting; disabled unless SNAPSHOT_DIR is set
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', '')
+SNAPSHOT_DEBOUNCE_SECONDS = float(os.environ.get('SNAPSHOT_DEBOUNCE_SECONDS', '5'))
+SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get('SNAPSHOT_INTERVAL_SECONDS', '900'))
+# Image ingestion: WebP variants stored by content hash under IMAGES_DIR
+IMAGES_DIR = Path(os.environ.get('IMAGES_DIR', str(ROOT_DIR / 'imagens')))
+# Public prefix for stored images; set an absolute URL when the frontend is served elsewhere
+IMAGES_BASE_URL = os.environ.get('IMAGES_BASE_URL', '/api/imagens').rstrip('/')
+IMAGE_WIDTHS = tuple(int(width) for width in os.environ.get('IMAGE_WIDTHS', '160,480,960').split(','))
+# Variant used as imagemProduto on listing pages
+IMAGE_LISTING_WIDTH = int(os.environ.get('IMAGE_LISTING_WIDTH', '480'))
+IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', '80'))
+IMAGE_MAX_BYTES = int(os.environ.get('IMAGE_MAX_BYTES', str(10 * 1024 * 1024)))
+IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', str(40_000_000)))
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+IMAGE_FETCH_TIMEOUT_SECONDS = float(os.environ.get('IMAGE_FETCH_TIMEOUT_SECONDS', '10'))
+IMAGE_FETCH_MAX_REDIRECTS = int(os.environ.get('IMAGE_FETCH_MAX_REDIRECTS', '3'))
+# Only for development against a local image server: allows private addresses
+IMAGE_ALLOW_PRIVATE_URLS = os.environ.get('IMAGE_ALLOW_PRIVATE_URLS', 'false').lower() in ('1', 'true', 'yes')
+
+# Indexes built on startup. The promocoes listing filters on categoria_id/ativo
+# (equality) and sorts by one of the SORT_OPTIONS fields, so every sort field gets
+# an index for each filter shape; descending keys also serve the ascending sorts.
+# The price/discount range filters hit the same indexes: a range on the sort
+# field is a bounded scan in sort order, and the other range fields follow the
+# sort keys (equality, sort, range), so a range on them is checked against the
+# index keys while walking in sort order and only matching documents are fetched.
+RANGE_FIELDS = ("precoOferta", "percentualDesconto")
+LISTING_SORT_FIELDS = sorted({sort[0][0] for sort in SORT_OPTIONS.values()})
+
+def _listing_indexes() -> List[IndexModel]:
+    indexes = []
+    for field in LISTING_SORT_FIELDS:
+        range_fields = [name for name in RANGE_FIELDS if name != field]
+        keys = [(field, DESCENDING), ("id", DESCENDING)] + [(name, ASCENDING) for name in range_fields]
+        suffix = f"{field}_id_desc" + "".join(f"_{name}" for name in range_fields)
+        indexes.extend([
+            IndexModel(keys, name=suffix),
+            IndexModel([("ativo", ASCENDING)] + keys, name=f"ativo_{suffix}"),
+            IndexModel(
+                [("categoria_id", ASCENDING), ("ativo", ASCENDING)] + keys,
+                name=f"categoria_ativo_{suffix}"
+            ),
+        ])
+    return indexes
+
+INDEXES = {
+    "promocoes": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Multikey index over the accent-folded title words; serves prefix search,
+        # and whole-word search already sorted by discount
+        IndexModel(
+            [("termosBusca", ASCENDING), ("ativo", ASCENDING), ("percentualDesconto", DESCENDING), ("id", DESCENDING)],
+            name="termosBusca_ativo_percentualDesconto_id_desc"
+        ),
+        # Only active promotions with an expiry date are of interest to the expiry job
+        IndexModel(
+            [("dataExpiracao", ASCENDING)],
+            name="dataExpiracao_ativo_partial",
+            partialFilterExpression={"ativo": True, "dataExpiracao": {"$exists": True}}
+        ),
+    ] + _listing_indexes(),
+    "promocoes_arquivo": [IndexModel([("id", ASCENDING)], name="id_unique", unique=True)],
+    "categorias": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+    ],
+    "usuarios": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "config": [IndexModel([("type", ASCENDING)], name="type_unique", unique=True)],
+}
+
 class Categoria(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     nome: str
@@ -51,32 +531,56 @@ class Promocao(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     titulo: str
     imagemProduto: str  # URL da imagem
+    miniaturas: Optional[Dict[str, str]] = None  # largura -> URL, para imagens armazenadas localmente
     precoOriginal: float
     precoOferta: float
     percentualDesconto: float
     linkOferta: str
     categoria_id: str
     dataPostagem: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    dataExpiracao: Optional[datetime] = None
     ativo: bool = True
 
+class PromocaoCard(BaseModel):
+    # Fields shown on listing cards (?formato=card)
+    id: str
+    titulo: str
+    imagemProduto: str
+    miniaturas: Optional[Dict[str, str]] = None
+    precoOriginal: float
+    precoOferta: float
+    percentualDesconto: float
+    categoria_id: str
+
 class PromocaoCreate(BaseModel):
     titulo: str
     imagemProduto: str
+    miniaturas: Optional[Dict[str, str]] = None
     precoOriginal: float
     precoOferta: float
     linkOferta: str
     categoria_id: str
+    dataExpiracao: Optional[datetime] = None
     ativo: bool = True
 
 class PromocaoUpdate(BaseModel):
     titulo: Optional[str] = None
     imagemProduto: Optional[str] = None
+    miniaturas: Optional[Dict[str, str]] = None
     precoOriginal: Optional[float] = None
     precoOferta: Optional[float] = None
     linkOferta: Optional[str] = None
     categoria_id: Optional[str] = None
+    dataExpiracao: Optional[datetime] = None
     ativo: Optional[bool] = None
 
+class PromocaoBulkUpdate(BaseModel):
+    # Selectors (combined with AND); at least one is required
+    ids: Optional[List[str]] = None
+    categoria_id: Optional[str] = None
+    postadas_antes_de: Optional[datetime] = None
+    alteracoes: PromocaoUpdate
+
 class Usuario(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     email: EmailStr
@@ -104,6 +608,56 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+class PasswordHasherPool:
+    """Runs bcrypt calls in a bounded thread pool instead of on the event loop.
+
+    Calls beyond ``max_queue`` pending ones are rejected with 503 rather than
+    queued, so a login burst cannot pile up unbounded work.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.pending = 0
+        self.rejected = 0
+        self.wait = LatencyStats()
+        self.run_time = LatencyStats()
+
+    async def run(self, func, *args):
+        if self.pending >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente")
+
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            return started, func(*args), time.perf_counter()
+
+        self.pending += 1
+        try:
+            started, result, finished = await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+        self.wait.observe(started - submitted)
+        bcrypt_wait.observe(started - submitted)
+        self.run_time.observe(finished - started)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "wait": self.wait.summary(),
+            "run": self.run_time.summary(),
+        }
+
+password_pool = PasswordHasherPool(BCRYPT_WORKERS, BCRYPT_MAX_QUEUE)
+Gauge("bcrypt_pool_pending", "bcrypt calls queued or running", collect=lambda: {(): password_pool.pending})
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -111,32 +665,1157 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Keyset pagination cursors: an opaque token holding the sort key of the last
+# promotion returned, so the next page starts right after it through the index
+def encode_cursor(ordenar_por: str, promocao: dict) -> str:
+    field = SORT_OPTIONS[ordenar_por][0][0]
+    value = promocao[field]
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    payload = json.dumps({"o": ordenar_por, "v": value, "id": promocao["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, ordenar_por: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, last_id = payload["v"], payload["id"]
+        if payload["o"] != ordenar_por or not isinstance(last_id, str):
+            raise ValueError("cursor from another ordering")
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["$date"])
+        elif not isinstance(value, (int, float)):
+            raise ValueError("unexpected sort value")
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    (field, direction), _ = SORT_OPTIONS[ordenar_por]
+    op = "$lt" if direction == -1 else "$gt"
+    return {"$or": [{field: {op: value}}, {field: value, "id": {op: last_id}}]}
+
+def search_terms(text: str) -> List[str]:
+    # Lowercase words without accents, so "Eletrônico" and "eletronico" match
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return list(dict.fromkeys(re.findall(r"[a-z0-9]+", folded)))
+
+def promocao_document(promocao_obj: "Promocao") -> dict:
+    # Stored form of a promotion: the model plus the words indexed for search
+    document = promocao_obj.dict()
+    document["termosBusca"] = search_terms(promocao_obj.titulo)
+    return document
+
+# Fields an update may clear by sending null; for the others null means "unchanged"
+NULLABLE_UPDATE_FIELDS = ("dataExpiracao",)
+
+def promocao_changes(update: "PromocaoUpdate") -> dict:
+    changes = {
+        k: v for k, v in update.dict(exclude_unset=True).items()
+        if v is not None or k in NULLABLE_UPDATE_FIELDS
+    }
+    # A new image URL makes the stored variants stale
+    if "imagemProduto" in changes and "miniaturas" not in changes:
+        changes["miniaturas"] = None
+    return changes
+
 def calculate_discount_percentage(original_price: float, offer_price: float) -> float:
     if original_price <= 0:
         return 0.0
     return round(((original_price - offer_price) / original_price) * 100, 2)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+# Response cache
+class TTLCache:
+    """LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Keys are tuples whose first item is a namespace, so every entry derived
+    from one collection can be dropped with ``invalidate(namespace)``.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: tuple, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: tuple):
+        self._entries.pop(key, None)
+
+    def invalidate(self, namespace: Hashable):
+        for key in [key for key in self._entries if key[0] == namespace]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+# Response compression
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+    for encoding in ("br", "gzip"):
+        if qualities.get(encoding, qualities.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def compress_body(body: bytes, encoding: str, fast: bool = False) -> bytes:
+    # Bodies kept in the response cache are compressed once, so they can
+    # afford the slower, denser settings
+    if encoding == "br":
+        return brotli.compress(body, quality=4 if fast else 8)
+    compressor = zlib.compressobj(6 if fast else 9, zlib.DEFLATED, 31)  # 31: gzip container
+    return compressor.compress(body) + compressor.flush()
+
+class CompressionMiddleware:
+    """gzip/brotli for responses that aren't compressed already.
+
+    Cached catalog responses arrive with Content-Encoding set and pass through
+    untouched; streamed bodies are compressed chunk by chunk with a sync flush,
+    except server-sent events, which must reach the client as they happen.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        encoding = None
+        if scope["type"] == "http":
+            encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        def new_compressor():
+            return brotli.Compressor(quality=4) if encoding == "br" else zlib.compressobj(6, zlib.DEFLATED, 31)
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Decided from the headers, so streams get theirs right away
+                headers = MutableHeaders(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                content_length = headers.get("content-length")
+                if (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith("text/event-stream")
+                    or (content_length is not None and int(content_length) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if content_length is None:
+                    # Streamed body: compress chunk by chunk from the first one
+                    compressor = new_compressor()
+                    await send(message)
+                    return
+                # Known length: hold the headers until the body sets the new length
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if not more_body:
+                    message["body"] = compress_body(body, encoding, fast=True)
+                    headers["Content-Length"] = str(len(message["body"]))
+                    await send(start_message)
+                    await send(message)
+                    passthrough = True
+                    return
+                del headers["Content-Length"]
+                await send(start_message)
+                compressor = new_compressor()
+
+            if encoding == "br":
+                chunk = compressor.process(body) + (compressor.flush() if more_body else compressor.finish())
+            else:
+                chunk = compressor.compress(body) + compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+class CachedBody:
+    """A serialized response plus its compressed variants, built on first use."""
+
+    def __init__(self, body: bytes, headers: dict):
+        self.body = body
+        self.headers = headers
+        self.variants = {}
+
+    def encoded(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        if encoding is None or len(self.body) < COMPRESSION_MIN_SIZE:
+            return self.body, None
+        if encoding not in self.variants:
+            self.variants[encoding] = compress_body(self.body, encoding)
+        return self.variants[encoding], encoding
+
+    def to_bytes(self) -> bytes:
+        # Compressed variants are rebuilt by each worker on first use
+        return json.dumps(self.headers).encode("utf-8") + b"\n" + self.body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedBody":
+        headers, _, body = data.partition(b"\n")
+        return cls(body, json.loads(headers))
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers using the same key.
+
+    The call runs as its own task, so a leader whose client disconnects does
+    not cancel the load for the requests coalesced onto it.
+    """
+
+    def __init__(self):
+        self._calls: "dict[Hashable, asyncio.Task]" = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Retrieve it so an error nobody waited for isn't logged as unhandled
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+# Concurrent misses for the same catalog cache key share one database load
+catalog_loads = SingleFlight()
+Counter("catalog_loads_total", "Catalog cache misses by whether they ran the load or joined one", ("result",),
+        collect=lambda: {("leader",): catalog_loads.leaders, ("coalesced",): catalog_loads.coalesced})
+Gauge("catalog_loads_in_flight", "Catalog loads currently running",
+      collect=lambda: {(): len(catalog_loads._calls)})
+
+# Public catalog responses, pre-serialized: key -> CachedBody.
+# Keys carry the collection version, so an entry never outlives a write made
+# through this process; other changes are picked up when the entry expires.
+response_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+# Per-collection versions bumped by every write route; a shared cache backend
+# makes them common to every worker.
+BOOT_TIME = datetime.now(timezone.utc)
+collection_versions = {"promocoes": 0, "categorias": 0, "config": 0, "estatisticas": 0}
+collection_changed_at = {name: BOOT_TIME for name in collection_versions}
+
+# Set by catalog writes; the stats refresher and the snapshot exporter wait on them
+stats_dirty = asyncio.Event()
+snapshot_dirty = asyncio.Event()
+
+async def mark_changed(namespace: str):
+    # Our own write is always applied here, whatever the shared counter returns
+    version = max(await cache_backend.next_version(namespace), collection_versions[namespace] + 1)
+    message = {
+        "type": "colecao",
+        "namespace": namespace,
+        "version": version,
+        "changed_at": datetime.now(timezone.utc).isoformat(),
+    }
+    apply_invalidation(message)
+    await cache_backend.publish(message)
+
+def catalog_reader(namespace: str):
+    # A read from a lagging secondary right after a write would be cached under
+    # the new version (and shared with other workers), so those go to the primary
+    since_change = datetime.now(timezone.utc) - collection_changed_at[namespace]
+    if since_change < timedelta(seconds=MONGO_PRIMARY_AFTER_WRITE_SECONDS):
+        return db
+    return catalog_db
+
+def catalog_cache_key(namespace: str, *params: Hashable) -> tuple:
+    return (namespace, collection_versions[namespace]) + params
+
+def make_etag(body: bytes) -> str:
+    # From the body itself: writes this process never saw (other workers,
+    # direct database changes) still change the ETag once the entry is reloaded
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def shared_cache_key(cache_key: tuple) -> str:
+    digest = hashlib.sha1(repr(cache_key[2:]).encode("utf-8")).hexdigest()[:16]
+    return f"{cache_key[0]}:{cache_key[1]}:{digest}"
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = []
+    for tag in if_none_match.split(","):
+        # If-None-Match uses the weak comparison, and any encoding of the
+        # representation is still the same representation
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        for suffix in ('-gzip"', '-br"'):
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)] + '"'
+        candidates.append(tag)
+    return "*" in candidates or etag in candidates
+
+def as_utc(value: datetime) -> datetime:
+    # Motor returns naive datetimes that are already in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def not_modified_since(if_modified_since: str, last_modified: str) -> bool:
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if user_id is None:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+async def cached_catalog_response(
+    request: Request,
+    cache_key: tuple,
+    load: Callable[[], Awaitable[Tuple[Any, Optional[datetime], dict]]]
+) -> Response:
+    """Serve a public catalog read from the response cache.
+
+    ``load`` returns ``(data or pre-rendered bytes, newest timestamp, extra headers)`` and only runs
+    on a cache miss. The ETag is a hash of the body stored with the entry, so
+    conditional requests are answered with 304 from the cache, and after a
+    reload only if the body is unchanged.
+    """
+    async def fill() -> CachedBody:
+        shared = await cache_backend.get(shared_cache_key(cache_key))
+        if shared is not None:
+            cached = CachedBody.from_bytes(shared)
+            response_cache.set(cache_key, cached)
+            return cached
+
+        data, newest, headers = await load()
+        # Updates don't touch dataPostagem, so the last write seen counts too
+        last_modified = collection_changed_at[cache_key[0]]
+        if newest is not None:
+            last_modified = max(last_modified, as_utc(newest))
+        body = data if isinstance(data, bytes) else render_json(data)
+        headers = {
+            **headers,
+            "ETag": make_etag(body),
+            "Last-Modified": format_datetime(last_modified.replace(microsecond=0), usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+        cached = CachedBody(body, headers)
+        response_cache.set(cache_key, cached)
+        await cache_backend.set(shared_cache_key(cache_key), cached.to_bytes(), CACHE_TTL_SECONDS)
+        return cached
+
+    cached = response_cache.get(cache_key)
+    if cached is None:
+        # The key carries the collection version, so a load never serves
+        # requests that arrive after a write
+        cached = await catalog_loads.do(cache_key, fill)
+
+    headers = dict(cached.headers)
+    etag = headers["ETag"]
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is None and if_modified_since and not_modified_since(if_modified_since, headers["Last-Modified"]):
+        return Response(status_code=304, headers={
+            "ETag": etag, "Last-Modified": headers["Last-Modified"], "Cache-Control": "no-cache"
+        })
+
+    # Compressed variants live in the cache entry, so hits cost no compression
+    body, encoding = cached.encoded(choose_encoding(request.headers.get("accept-encoding", "")))
+    headers["Vary"] = "Accept-Encoding"
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        # Strong ETags must differ between byte-different encodings
+        headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Authenticated users: decoded JWT payloads keyed by token hash, and users by id
+token_cache = TTLCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
+user_cache = TTLCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
+
+_caches = {"responses": response_cache, "tokens": token_cache, "users": user_cache}
+Counter("cache_hits_total", "Cache hits", ("cache",),
+        collect=lambda: {(name,): cache.hits for name, cache in _caches.items()})
+Counter("cache_misses_total", "Cache misses", ("cache",),
+        collect=lambda: {(name,): cache.misses for name, cache in _caches.items()})
+Counter("cache_evictions_total", "Cache LRU evictions", ("cache",),
+        collect=lambda: {(name,): cache.evictions for name, cache in _caches.items()})
+
+async def invalidate_user(user_id: str):
+    # No route changes or removes users yet; anything that does must call this
+    user_cache.delete(("usuario", user_id))
+    await cache_backend.delete(f"usuario:{user_id}")
+    await cache_backend.publish({"type": "usuario", "id": user_id})
+
+# Shared cache backends. Every worker keeps its own caches above as the first
+# tier; a shared backend adds a second tier read on local misses, collection
+# versions common to all workers, and invalidation messages between them.
+def apply_invalidation(message: dict):
+    if message["type"] == "colecao":
+        namespace = message["namespace"]
+        # Our own messages come back too, and may cross a newer one
+        if message["version"] <= collection_versions[namespace]:
+            return
+        collection_versions[namespace] = message["version"]
+        collection_changed_at[namespace] = datetime.fromisoformat(message["changed_at"])
+        response_cache.invalidate(namespace)
+        if namespace in ("promocoes", "categorias"):
+            stats_dirty.set()
+        if namespace in ("promocoes", "categorias", "config"):
+            snapshot_dirty.set()
+    elif message["type"] == "usuario":
+        user_cache.delete(("usuario", message["id"]))
+
+class MemoryCacheBackend:
+    """Single-process backend: the local caches are the only tier."""
+
+    name = "memory"
+
+    async def start(self):
+        pass
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        pass
+
+    async def delete(self, key: str):
+        pass
+
+    async def next_version(self, namespace: str) -> int:
+        return collection_versions[namespace] + 1
+
+    async def publish(self, message: dict):
+        pass
+
+    async def listen(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+class RedisCacheBackend:
+    """Backend shared through a Redis-protocol server.
+
+    Entries are stored under ``<prefix>:<key>`` with a TTL, versions are
+    ``INCR`` counters and invalidations go out on the ``<prefix>:invalidacao``
+    channel. Redis errors never fail a request: reads miss, writes are skipped
+    and versions fall back to local counters until the server is back.
+    """
+
+    name = "redis"
+
+    def __init__(self, connection: "aioredis.Redis", prefix: str):
+        self.redis = connection
+        self.prefix = prefix
+        self.channel = f"{prefix}:invalidacao"
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.messages = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _failed(self, operation: str, error: Exception):
+        self.errors += 1
+        logger.warning("Redis %s failed: %s", operation, error)
+
+    async def start(self):
+        try:
+            await self.sync()
+        except redis.RedisError as e:
+            self._failed("start", e)
+
+    async def sync(self):
+        """Reconcile local and shared versions, at startup and after reconnecting.
+
+        Versions published while we weren't subscribed are applied locally;
+        versions we took while Redis was unreachable (or that Redis lost to a
+        flush or restart) are pushed to the counter and announced, so the
+        other workers, which missed them, drop their entries too.
+        """
+        namespaces = list(collection_versions)
+        versions = await self.redis.mget([self._key(f"versao:{name}") for name in namespaces])
+        changed_at = await self.redis.hgetall(self._key("alterado"))
+        for namespace, version in zip(namespaces, versions):
+            remote = int(version or 0)
+            local = collection_versions[namespace]
+            if remote > local:
+                apply_invalidation({
+                    "type": "colecao",
+                    "namespace": namespace,
+                    "version": remote,
+                    "changed_at": changed_at.get(namespace.encode("utf-8"), BOOT_TIME.isoformat().encode("utf-8")).decode("utf-8"),
+                })
+            elif remote < local:
+                await self.redis.incrby(self._key(f"versao:{namespace}"), local - remote)
+                await self.publish({
+                    "type": "colecao",
+                    "namespace": namespace,
+                    "version": local,
+                    "changed_at": collection_changed_at[namespace].isoformat(),
+                })
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            value = await self.redis.get(self._key(key))
+        except redis.RedisError as e:
+            self._failed("get", e)
+            return None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        try:
+            await self.redis.set(self._key(key), value, px=max(1, int(ttl * 1000)))
+        except redis.RedisError as e:
+            self._failed("set", e)
+
+    async def delete(self, key: str):
+        try:
+            await self.redis.delete(self._key(key))
+        except redis.RedisError as e:
+            self._failed("delete", e)
+
+    async def next_version(self, namespace: str) -> int:
+        key = self._key(f"versao:{namespace}")
+        local = collection_versions[namespace]
+        try:
+            version = await self.redis.incr(key)
+            if version <= local:
+                # The counter is behind versions taken locally during an outage,
+                # or was lost: move it past ours so other workers accept the message
+                version = await self.redis.incrby(key, local + 1 - version)
+            return version
+        except redis.RedisError as e:
+            self._failed("incr", e)
+            return local + 1
+
+    async def publish(self, message: dict):
+        # Callers apply the change locally; this only tells the other workers
+        try:
+            if message["type"] == "colecao":
+                await self.redis.hset(self._key("alterado"), message["namespace"], message["changed_at"])
+            await self.redis.publish(self.channel, json.dumps(message))
+        except redis.RedisError as e:
+            self._failed("publish", e)
+
+    async def listen(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                await self.sync()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.messages += 1
+                        apply_invalidation(json.loads(message["data"]))
+            except redis.RedisError as e:
+                self._failed("subscribe", e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def close(self):
+        await self.redis.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "messages_received": self.messages,
+        }
+
+def create_cache_backend():
+    if CACHE_BACKEND == "redis":
+        return RedisCacheBackend(aioredis.from_url(REDIS_URL), CACHE_KEY_PREFIX)
+    return MemoryCacheBackend()
+
+cache_backend = create_cache_backend()
+Counter("shared_cache_requests_total", "Shared cache tier lookups", ("result",),
+        collect=lambda: {("hit",): getattr(cache_backend, "hits", 0), ("miss",): getattr(cache_backend, "misses", 0)})
+Counter("shared_cache_errors_total", "Failed shared cache operations",
+        collect=lambda: {(): getattr(cache_backend, "errors", 0)})
+
+# Known category ids, keyed by the categorias version like the response cache
+category_cache = TTLCache(1, CACHE_TTL_SECONDS)
+
+async def categoria_exists(categoria_id: str) -> bool:
+    cache_key = catalog_cache_key("categorias", "ids")
+    categoria_ids = category_cache.get(cache_key)
+    if categoria_ids is None:
+        categoria_ids = set(await db.categorias.distinct("id"))
+        category_cache.set(cache_key, categoria_ids)
+    if categoria_id in categoria_ids:
+        return True
+    # May have been created through another worker since the set was loaded
+    return await db.categorias.find_one({"id": categoria_id}, {"_id": 1}) is not None
+
+def discount_update(update_dict: dict):
+    """Build the update document for ``update_dict``, keeping percentualDesconto in sync.
+
+    With both prices the discount is a constant; with only one of them it is
+    computed server-side by an aggregation-pipeline update from the stored
+    other price, so the current document never has to be read first.
+    """
+    has_original = "precoOriginal" in update_dict
+    has_offer = "precoOferta" in update_dict
+    if has_original and has_offer:
+        update_dict = dict(update_dict)
+        update_dict["percentualDesconto"] = calculate_discount_percentage(
+            update_dict["precoOriginal"], update_dict["precoOferta"]
+        )
+    if has_original == has_offer:
+        return {"$set": update_dict}
+
+    return [
+        # $literal keeps string values such as "$10 off" from being read as field paths
+        {"$set": {key: {"$literal": value} for key, value in update_dict.items()}},
+        {"$set": {"percentualDesconto": {"$cond": [
+            {"$gt": ["$precoOriginal", 0]},
+            {"$round": [{"$multiply": [
+                {"$divide": [{"$subtract": ["$precoOriginal", "$precoOferta"]}, "$precoOriginal"]},
+                100
+            ]}, 2]},
+            0.0
+        ]}}},
+    ]
+
+def calculate_discount_percentages(original_prices: np.ndarray, offer_prices: np.ndarray) -> np.ndarray:
+    # Vectorized calculate_discount_percentage for a whole batch
+    with np.errstate(divide="ignore", invalid="ignore"):
+        discounts = np.round((original_prices - offer_prices) / original_prices * 100, 2)
+    return np.where(original_prices > 0, discounts, 0.0)
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    token_key = ("token", hashlib.sha256(token.encode("utf-8")).hexdigest())
+    payload = token_cache.get(token_key)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except (JWTError, jwt.PyJWTError):
             raise HTTPException(status_code=401, detail="Token inválido")
-    except JWTError:
+        token_cache.set(token_key, payload)
+    elif payload.get("exp", 0) <= time.time():
+        # A memoized payload may outlive the token itself
+        token_cache.delete(token_key)
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+    user_id = payload.get("sub")
+    if user_id is None:
         raise HTTPException(status_code=401, detail="Token inválido")
     
-    user = await db.usuarios.find_one({"id": user_id})
+    user = user_cache.get(("usuario", user_id))
     if user is None:
-        raise HTTPException(status_code=401, detail="Usuário não encontrado")
+        shared = await cache_backend.get(f"usuario:{user_id}")
+        if shared is not None:
+            user = Usuario(**json.loads(shared))
+        else:
+            user_doc = await db.usuarios.find_one({"id": user_id})
+            if user_doc is None:
+                raise HTTPException(status_code=401, detail="Usuário não encontrado")
+            user = Usuario(**user_doc)
+            await cache_backend.set(f"usuario:{user_id}", render_json(user), AUTH_CACHE_TTL_SECONDS)
+        user_cache.set(("usuario", user_id), user)
     
-    return Usuario(**user)
+    return user
+
+def _plan_stages(plan: dict) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return [stage for stage in stages if stage]
+
+# Create indexes (idempotent: existing indexes with the same spec are a no-op)
+async def ensure_indexes():
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+            except OperationFailure as e:
+                # e.g. duplicated slugs already stored; keep starting up and report it
+                logger.warning(
+                    "Could not create index %s on %s: %s",
+                    index.document["name"], collection, e
+                )
+
+# Fill termosBusca on promotions stored before search existed, in batches
+async def backfill_search_terms(batch_size: int = 1000):
+    total = 0
+    while True:
+        batch = await db.promocoes.find(
+            {"termosBusca": {"$exists": False}}, {"_id": 0, "id": 1, "titulo": 1}
+        ).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        await db.promocoes.bulk_write([
+            UpdateOne({"id": promo["id"]}, {"$set": {"termosBusca": search_terms(promo.get("titulo", ""))}})
+            for promo in batch
+        ], ordered=False)
+        total += len(batch)
+    if total:
+        logger.info("Search terms filled for %d promotions", total)
+        await mark_changed("promocoes")
+
+# Catalog statistics, materialized in db.estatisticas by a background task so
+# GET /api/stats never aggregates on the request path
+def _price_bucket_labels() -> List[str]:
+    labels = [f"{low}-{high}" for low, high in zip(PRICE_BUCKETS, PRICE_BUCKETS[1:])]
+    return labels + [f"{PRICE_BUCKETS[-1]}+"]
+
+async def refresh_catalog_stats() -> dict:
+    labels = _price_bucket_labels()
+    price_bucket = {"$switch": {
+        "branches": [
+            {"case": {"$lt": ["$precoOferta", high]}, "then": label}
+            for high, label in zip(PRICE_BUCKETS[1:], labels)
+        ],
+        "default": labels[-1],
+    }}
+    groups = await db.promocoes.aggregate([
+        {"$match": {"ativo": True}},
+        {"$group": {
+            "_id": {"categoria_id": "$categoria_id", "faixa": price_bucket},
+            "total": {"$sum": 1},
+            "descontoSoma": {"$sum": "$percentualDesconto"},
+            "descontoMaximo": {"$max": "$percentualDesconto"},
+        }},
+    ]).to_list(None)
+
+    def empty_entry(categoria_id):
+        return {
+            "categoria_id": categoria_id,
+            "total": 0,
+            "descontoMedio": 0.0,
+            "descontoMaximo": 0.0,
+            "faixasPreco": dict.fromkeys(labels, 0),
+        }
+
+    categorias = {categoria_id: empty_entry(categoria_id) for categoria_id in await db.categorias.distinct("id")}
+    overall = empty_entry(None)
+    for group in groups:
+        categoria_id, faixa = group["_id"]["categoria_id"], group["_id"]["faixa"]
+        entry = categorias.setdefault(categoria_id, empty_entry(categoria_id))
+        for target in (entry, overall):
+            target["total"] += group["total"]
+            target["descontoMedio"] += group["descontoSoma"]  # summed here, averaged below
+            target["descontoMaximo"] = max(target["descontoMaximo"], group["descontoMaximo"] or 0.0)
+            target["faixasPreco"][faixa] += group["total"]
+    for entry in list(categorias.values()) + [overall]:
+        entry["descontoMedio"] = round(entry["descontoMedio"] / entry["total"], 2) if entry["total"] else 0.0
+
+    stats = {
+        "total": overall["total"],
+        "descontoMedio": overall["descontoMedio"],
+        "descontoMaximo": overall["descontoMaximo"],
+        "faixasPreco": overall["faixasPreco"],
+        "categorias": sorted(categorias.values(), key=lambda entry: -entry["total"]),
+        "atualizadoEm": datetime.now(timezone.utc),
+    }
+    await db.estatisticas.replace_one({"_id": "catalogo"}, stats, upsert=True)
+    await mark_changed("estatisticas")
+    return stats
+
+# Push feed
+class EventBroadcaster:
+    """Fan-out of server-sent events through one shared ring buffer.
+
+    Each event is encoded once; subscribers only keep the sequence number of
+    the last event they sent and read the same bytes objects from the buffer.
+    """
+
+    def __init__(self, size: int):
+        self.buffer = deque(maxlen=size)
+        self.seq = 0
+        self.subscribers = 0
+        self._new_event = asyncio.Event()
+
+    def publish(self, event: str, data: dict):
+        self.seq += 1
+        payload = render_json(data, plain=True)
+        self.buffer.append((self.seq, f"id: {self.seq}\nevent: {event}\ndata: ".encode("utf-8") + payload + b"\n\n"))
+        # Wake everyone waiting on the current event and start a fresh one
+        new_event, self._new_event = self._new_event, asyncio.Event()
+        new_event.set()
+
+    async def subscribe(self, last_event_id: Optional[int] = None):
+        sent = self.seq if last_event_id is None else min(last_event_id, self.seq)
+        self.subscribers += 1
+        try:
+            while True:
+                first_seq = self.buffer[0][0] if self.buffer else self.seq + 1
+                if sent < first_seq - 1:
+                    # Fell behind the buffer: the client has to reload the listing
+                    yield b"event: promocao\ndata: {\"tipo\":\"recarregar\"}\n\n"
+                    sent = first_seq - 1
+                if sent < self.seq:
+                    # Copy references only: publishing while we yield mutates the deque
+                    for seq, payload in list(islice(self.buffer, sent - first_seq + 1, None)):
+                        yield payload
+                        sent = seq
+                    continue
+                new_event = self._new_event
+                try:
+                    await asyncio.wait_for(new_event.wait(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            self.subscribers -= 1
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscribers,
+            "last_event_id": self.seq,
+            "buffered": len(self.buffer),
+            "change_stream": PROMOCOES_CHANGE_STREAM,
+        }
+
+events = EventBroadcaster(EVENTS_BUFFER_SIZE)
+Gauge("events_subscribers", "Open server-sent event streams", collect=lambda: {(): events.subscribers})
+
+def card_delta(promocao: dict) -> dict:
+    return {field: promocao.get(field) for field in CARD_FIELDS + ["ativo"]}
+
+def publish_promocao_event(tipo: str, promocao: Optional[dict] = None, promocao_id: Optional[str] = None):
+    # Compact deltas: card fields for created/updated offers, only the id for
+    # removals, and "recarregar" when a bulk change should trigger a refetch
+    if PROMOCOES_CHANGE_STREAM:
+        return
+    data = {"tipo": tipo}
+    if promocao is not None:
+        data["promocao"] = card_delta(promocao)
+    if promocao_id is not None:
+        data["id"] = promocao_id
+    events.publish("promocao", data)
+
+async def watch_promocoes_changes():
+    interrupted = False
+    while True:
+        try:
+            async with db.promocoes.watch(full_document="updateLookup") as stream:
+                if interrupted:
+                    # Changes made while the stream was down were never published
+                    events.publish("promocao", {"tipo": "recarregar"})
+                    interrupted = False
+                async for change in stream:
+                    operation = change["operationType"]
+                    if operation == "insert":
+                        events.publish("promocao", {"tipo": "criada", "promocao": card_delta(change["fullDocument"])})
+                    elif operation in ("update", "replace") and change.get("fullDocument"):
+                        events.publish("promocao", {"tipo": "atualizada", "promocao": card_delta(change["fullDocument"])})
+                    else:
+                        # Deletes only carry the Mongo _id, not the promotion id
+                        events.publish("promocao", {"tipo": "recarregar"})
+        except PyMongoError as e:
+            # Not a replica set, lost connection, server selection timeout...
+            # The write routes don't publish in this mode, so keep retrying
+            logger.error("Change stream on promocoes failed: %s", e)
+            interrupted = True
+        await asyncio.sleep(5)
+
+# Background jobs
+class Scheduler:
+    """Runs periodic coroutines on the event loop and records how each run went.
+
+    A job runs every ``interval`` seconds; jobs given a ``wake`` event also run
+    ``delay`` seconds after it is set, so a burst of writes triggers one run.
+    Job functions may return the number of rows they processed.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self._tasks = []
+
+    def add(self, name: str, func, interval: float, wake: Optional[asyncio.Event] = None, delay: float = 0.0):
+        self.jobs[name] = {
+            "func": func,
+            "interval": interval,
+            "wake": wake,
+            "delay": delay,
+            "stats": {
+                "runs": 0,
+                "failures": 0,
+                "rows_total": 0,
+                "last_run": None,
+                "last_duration_ms": None,
+                "last_rows": None,
+                "last_error": None,
+            },
+        }
+
+    async def _loop(self, name: str):
+        job = self.jobs[name]
+        while True:
+            if job["wake"] is None:
+                await asyncio.sleep(job["interval"])
+            else:
+                try:
+                    await asyncio.wait_for(job["wake"].wait(), timeout=job["interval"])
+                    await asyncio.sleep(job["delay"])
+                except asyncio.TimeoutError:
+                    pass
+                job["wake"].clear()
+            await self.run(name)
+
+    async def run(self, name: str):
+        job = self.jobs[name]
+        stats = job["stats"]
+        started = time.perf_counter()
+        try:
+            rows = await job["func"]()
+            stats["last_error"] = None
+        except Exception as e:
+            rows = None
+            stats["failures"] += 1
+            stats["last_error"] = str(e)
+            logger.exception("Job %s failed", name)
+        stats["runs"] += 1
+        stats["last_run"] = datetime.now(timezone.utc)
+        stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        stats["last_rows"] = rows if isinstance(rows, int) else None
+        stats["rows_total"] += stats["last_rows"] or 0
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._loop(name)) for name in self.jobs]
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            name: {"interval_seconds": job["interval"], **job["stats"]}
+            for name, job in self.jobs.items()
+        }
+
+async def expire_promocoes() -> int:
+    result = await db.promocoes.update_many(
+        {"ativo": True, "dataExpiracao": {"$lte": datetime.now(timezone.utc)}},
+        {"$set": {"ativo": False}}
+    )
+    if result.modified_count:
+        await mark_changed("promocoes")
+        publish_promocao_event("recarregar")
+    return result.modified_count
+
+async def archive_promocoes() -> int:
+    # Inactive promotions posted before the cutoff move to promocoes_arquivo
+    cutoff = datetime.now(timezone.utc) - timedelta(days=ARCHIVE_AFTER_DAYS)
+    archived = 0
+    while True:
+        batch = await db.promocoes.find(
+            {"ativo": False, "dataPostagem": {"$lt": cutoff}}
+        ).limit(ARCHIVE_BATCH_SIZE).to_list(ARCHIVE_BATCH_SIZE)
+        if not batch:
+            break
+        try:
+            await db.promocoes_arquivo.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Already archived by a run interrupted before its delete
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+        await db.promocoes.delete_many({"_id": {"$in": [promo["_id"] for promo in batch]}})
+        archived += len(batch)
+    if archived:
+        await mark_changed("promocoes")
+    return archived
+
+async def refresh_catalog_stats_job() -> int:
+    stats = await refresh_catalog_stats()
+    return stats["total"]
+
+# Static snapshot: the public read path as files for static hosting. Each
+# response is written under a content-hashed name, with gzip and brotli
+# variants, and manifest.json maps API paths to files. The manifest is replaced
+# last, so readers never see it point at a missing file.
+SNAPSHOT_NAME = re.compile(r"^[\w-]+\.[0-9a-f]{16}\.json(\.gz|\.br)?$")
+
+async def render_snapshot() -> dict:
+    """API path -> response body, rendered exactly as the routes would."""
+    categorias = await db.categorias.find().to_list(100)
+    config = await db.config.find_one({"type": "social_links"})
+    bodies = {
+        "/api/categorias": render_json([Categoria(**cat) for cat in categorias]),
+        "/api/config/links": render_json(
+            config["links"] if config else {"whatsapp": "https://wa.me/", "telegram": "https://t.me/"}
+        ),
+    }
+    # Default listing page for every categoria_id x ordenar_por (and no category)
+    for categoria_id in [None] + [cat["id"] for cat in categorias]:
+        query = {"ativo": True}
+        if categoria_id:
+            query["categoria_id"] = categoria_id
+        for ordenar_por, sort_by in SORT_OPTIONS.items():
+            promocoes = await db.promocoes.find(query).sort(sort_by).limit(DEFAULT_PAGE_SIZE).to_list(DEFAULT_PAGE_SIZE)
+            params = f"categoria_id={categoria_id}&ordenar_por={ordenar_por}" if categoria_id else f"ordenar_por={ordenar_por}"
+            bodies[f"/api/promocoes?{params}"] = render_json([Promocao(**promo) for promo in promocoes])
+    return bodies
+
+def snapshot_file_name(path: str, digest: str) -> str:
+    stem = re.sub(r"[^\w-]+", "-", path.removeprefix("/api/")).strip("-")
+    return f"{stem}.{digest}.json"
+
+def write_snapshot(directory: Path, bodies: dict, rendered_at: datetime) -> int:
+    """Write changed files and the manifest; returns how many files were written.
+
+    Every worker exports after a write, so exports into one directory are
+    serialized with a lock file, and one rendered before the current manifest
+    was is skipped.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            return _write_snapshot_locked(directory, bodies, rendered_at)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _write_snapshot_locked(directory: Path, bodies: dict, rendered_at: datetime) -> int:
+    manifest_path = directory / "manifest.json"
+    previous = json.loads(manifest_path.read_text()) if manifest_path.exists() else {"arquivos": {}}
+    if "geradoEm" in previous and datetime.fromisoformat(previous["geradoEm"]) >= rendered_at:
+        return 0
+
+    def write_atomic(target: Path, data: bytes):
+        temporary = target.with_name(f".{target.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, target)
+
+    written = 0
+    files = {}
+    for path, body in bodies.items():
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        name = snapshot_file_name(path, digest)
+        files[path] = {
+            "arquivo": name,
+            "gzip": f"{name}.gz",
+            "br": f"{name}.br",
+            "bytes": len(body),
+            "hash": digest,
+        }
+        # Same content, same name: unchanged responses are not rewritten
+        if (directory / name).exists():
+            continue
+        write_atomic(directory / f"{name}.gz", compress_body(body, "gzip"))
+        write_atomic(directory / f"{name}.br", compress_body(body, "br"))
+        write_atomic(directory / name, body)
+        written += 3
+
+    write_atomic(manifest_path, json.dumps({
+        # When the data was read, not written: newer exports compare against it
+        "geradoEm": rendered_at.isoformat(),
+        "arquivos": files,
+    }, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    # Keep the previous generation for clients still holding the old manifest
+    referenced = set()
+    for entries in (files, previous.get("arquivos", {})):
+        for entry in entries.values():
+            referenced.update((entry["arquivo"], entry["gzip"], entry["br"]))
+    for stale in directory.iterdir():
+        if SNAPSHOT_NAME.match(stale.name) and stale.name not in referenced:
+            stale.unlink(missing_ok=True)
+    return written
+
+async def export_catalog_snapshot() -> int:
+    rendered_at = datetime.now(timezone.utc)
+    bodies = await render_snapshot()
+    # Compression, file IO and waiting for the lock stay off the event loop
+    return await asyncio.to_thread(write_snapshot, Path(SNAPSHOT_DIR), bodies, rendered_at)
+
+scheduler = Scheduler()
+scheduler.add("expirar_promocoes", expire_promocoes, EXPIRY_INTERVAL_SECONDS)
+scheduler.add("arquivar_promocoes", archive_promocoes, ARCHIVE_INTERVAL_SECONDS)
+# Refresh stats shortly after catalog writes (debounced), and periodically to
+# pick up writes made through other workers
+scheduler.add(
+    "estatisticas", refresh_catalog_stats_job, STATS_REFRESH_SECONDS,
+    wake=stats_dirty, delay=STATS_DEBOUNCE_SECONDS
+)
+if SNAPSHOT_DIR:
+    scheduler.add(
+        "snapshot", export_catalog_snapshot, SNAPSHOT_INTERVAL_SECONDS,
+        wake=snapshot_dirty, delay=SNAPSHOT_DEBOUNCE_SECONDS
+    )
 
 # Initialize admin user
 async def create_admin_user():
     existing_admin = await db.usuarios.find_one({"email": "luiz.ribeiro@ofertas.pit"})
     if not existing_admin:
-        hashed_password = hash_password("secure")
+        hashed_password = await password_pool.run(hash_password, "secure")
         admin_user = {
             "id": str(uuid.uuid4()),
             "email": "luiz.ribeiro@ofertas.pit",
@@ -147,11 +1826,150 @@ async def create_admin_user():
         await db.usuarios.insert_one(admin_user)
         print("Admin user created: luiz.ribeiro@ofertas.pit")
 
+# Image ingestion
+IMAGE_FORMATS = ("JPEG", "PNG", "WEBP", "GIF")
+IMAGE_NAME = re.compile(r"^[0-9a-f]{64}\.webp$")
+
+def make_image_variants(data: bytes, directory: str, widths: Tuple[int, ...], quality: int, max_pixels: int) -> Dict[str, str]:
+    """Decode ``data`` and store one WebP per width; runs in the image process pool.
+
+    Files are named by the hash of their content, so identical images share
+    storage and a stored file never changes. Images are never upscaled.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        if source.format not in IMAGE_FORMATS:
+            raise ValueError(f"unsupported format {source.format}")
+        # Checked before decoding any pixel data
+        if source.width * source.height > max_pixels:
+            raise ValueError("image too large")
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    variants = {}
+    for width in widths:
+        variant = image
+        if width < image.width:
+            variant = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, "WEBP", quality=quality, method=4)
+        body = buffer.getvalue()
+        name = hashlib.sha256(body).hexdigest() + ".webp"
+        target = Path(directory) / name[:2] / name
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temporary = target.with_name(f".{name}.{os.getpid()}.tmp")
+            temporary.write_bytes(body)
+            os.replace(temporary, target)
+        variants[str(width)] = name
+    return variants
+
+# Decoding and resizing hold the GIL, so they run in separate processes.
+# Workers start from a clean forkserver instead of forking the running server,
+# which would copy its event loop, Mongo/Redis connections and held locks.
+image_pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("forkserver"))
+
+async def check_public_url(url: str) -> str:
+    """Resolve the host of ``url`` and return the address to connect to.
+
+    Refuses anything but http(s) to public addresses, so the server can't be
+    pointed at itself, the database or the cloud metadata endpoint.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise HTTPException(status_code=400, detail="URL de imagem inválida")
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(
+            parts.hostname, parts.port or (443 if parts.scheme == "https" else 80), type=socket.SOCK_STREAM
+        )
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="URL de imagem inválida")
+    for address in addresses:
+        if not ipaddress.ip_address(address[4][0]).is_global and not IMAGE_ALLOW_PRIVATE_URLS:
+            raise HTTPException(status_code=400, detail="URL de imagem não permitida")
+    return addresses[0][4][0]
+
+def download_image(url: str, address: str) -> Tuple[Optional[bytes], Optional[str]]:
+    """Fetch ``url`` from ``address`` without following redirects: (body, None) or (None, redirect target).
+
+    The connection goes to the address that was checked, not to a second
+    lookup of the host name, which could answer differently. TLS still
+    verifies the certificate against the host name.
+    """
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    timeout = urllib3.Timeout(total=IMAGE_FETCH_TIMEOUT_SECONDS)
+    if parts.scheme == "https":
+        pool = urllib3.HTTPSConnectionPool(
+            address, port, timeout=timeout, retries=False, cert_reqs="CERT_REQUIRED", ca_certs=certifi.where(),
+            server_hostname=parts.hostname, assert_hostname=parts.hostname,
+        )
+    else:
+        pool = urllib3.HTTPConnectionPool(address, port, timeout=timeout, retries=False)
+    target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    with pool:
+        response = pool.urlopen(
+            "GET", target, headers={"Host": parts.netloc.rpartition("@")[2]},
+            redirect=False, preload_content=False,
+        )
+        try:
+            if response.get_redirect_location():
+                return None, urljoin(url, response.get_redirect_location())
+            if response.status != 200:
+                raise ValueError(f"status {response.status}")
+            if not response.headers.get("content-type", "").startswith("image/"):
+                raise ValueError("not an image")
+            body = b""
+            for chunk in response.stream(64 * 1024):
+                body += chunk
+                if len(body) > IMAGE_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Imagem muito grande")
+            return body, None
+        finally:
+            response.release_conn()
+
+async def fetch_image(url: str) -> bytes:
+    # Every redirect target is validated again before it is requested
+    for _ in range(IMAGE_FETCH_MAX_REDIRECTS + 1):
+        address = await check_public_url(url)
+        try:
+            body, url = await asyncio.to_thread(download_image, url, address)
+        except (urllib3.exceptions.HTTPError, ValueError) as e:
+            logger.warning("Image download failed: %s", e)
+            raise HTTPException(status_code=502, detail="Não foi possível baixar a imagem")
+        if body is not None:
+            return body
+    raise HTTPException(status_code=502, detail="Redirecionamentos demais ao baixar a imagem")
+
+async def read_image_source(arquivo: Optional[UploadFile], url: Optional[str]) -> bytes:
+    if arquivo is not None:
+        data = await arquivo.read(IMAGE_MAX_BYTES + 1)
+        if len(data) > IMAGE_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Imagem muito grande")
+        return data
+    if url:
+        return await fetch_image(url)
+    raise HTTPException(status_code=400, detail="Envie um arquivo ou uma URL")
+
+async def ingest_image(data: bytes) -> Dict[str, str]:
+    """Store the variants of ``data`` and return their public URLs by width."""
+    try:
+        names = await asyncio.get_running_loop().run_in_executor(
+            image_pool, make_image_variants, data, str(IMAGES_DIR), IMAGE_WIDTHS, IMAGE_QUALITY, IMAGE_MAX_PIXELS
+        )
+    except (ValueError, OSError, Image.DecompressionBombError):
+        raise HTTPException(status_code=400, detail="Imagem inválida")
+    return {width: f"{IMAGES_BASE_URL}/{name}" for width, name in names.items()}
+
+def listing_image(miniaturas: Dict[str, str]) -> str:
+    # The configured listing width, or the closest one stored
+    width = min(miniaturas, key=lambda stored: abs(int(stored) - IMAGE_LISTING_WIDTH))
+    return miniaturas[width]
+
 # Auth Routes
 @api_router.post("/auth/login", response_model=Token)
 async def login(login_data: LoginRequest):
     user = await db.usuarios.find_one({"email": login_data.email})
-    if not user or not verify_password(login_data.senha, user["senha"]):
+    if not user or not await password_pool.run(verify_password, login_data.senha, user["senha"]):
         raise HTTPException(status_code=401, detail="Email ou senha incorretos")
     
     access_token = create_access_token(data={"sub": user["id"]})
@@ -165,15 +1983,23 @@ async def login(login_data: LoginRequest):
 
 # Categoria Routes
 @api_router.get("/categorias", response_model=List[Categoria])
-async def get_categorias():
-    categorias = await db.categorias.find().to_list(100)
-    return [Categoria(**cat) for cat in categorias]
+async def get_categorias(request: Request):
+    async def load():
+        categorias = await catalog_reader("categorias").categorias.find().to_list(100)
+        newest = max((cat["created_at"] for cat in categorias if cat.get("created_at")), default=None)
+        return [Categoria(**cat) for cat in categorias], newest, {}
+
+    return await cached_catalog_response(request, catalog_cache_key("categorias"), load)
 
 @api_router.post("/categorias", response_model=Categoria)
 async def create_categoria(categoria: CategoriaCreate, current_user: Usuario = Depends(get_current_user)):
     categoria_dict = categoria.dict()
     categoria_obj = Categoria(**categoria_dict)
-    await db.categorias.insert_one(categoria_obj.dict())
+    try:
+        await db.categorias.insert_one(categoria_obj.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Já existe uma categoria com este slug")
+    await mark_changed("categorias")
     return categoria_obj
 
 @api_router.delete("/categorias/{categoria_id}")
@@ -181,34 +2007,269 @@ async def delete_categoria(categoria_id: str, current_user: Usuario = Depends(ge
     result = await db.categorias.delete_one({"id": categoria_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Categoria não encontrada")
+    await mark_changed("categorias")
     return {"message": "Categoria removida com sucesso"}
 
 # Promocao Routes
-@api_router.get("/promocoes", response_model=List[Promocao])
+async def stream_promocoes_ndjson(query: dict, sort_by: list, limite: Optional[int]):
+    # Iterate the Motor cursor and flush one chunk per batch, so memory stays
+    # bounded by STREAM_BATCH_SIZE whatever the size of the result
+    cursor = catalog_reader("promocoes").promocoes.find(query).sort(sort_by).batch_size(STREAM_BATCH_SIZE)
+    if limite:
+        cursor = cursor.limit(limite)
+    batch = []
+    async for promo in cursor:
+        batch.append(render_json(Promocao(**promo)))
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+@api_router.get("/promocoes", response_model=Union[List[Promocao], List[PromocaoCard]])
 async def get_promocoes(
+    request: Request,
     categoria_id: Optional[str] = None,
     ordenar_por: Optional[str] = "data_recente",
-    ativo: Optional[bool] = True
+    ativo: Optional[bool] = True,
+    cursor: Optional[str] = None,
+    limite: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: Optional[str] = None,
+    formato: Optional[str] = None,
+    preco_min: Optional[float] = Query(None, ge=0),
+    preco_max: Optional[float] = Query(None, ge=0),
+    desconto_min: Optional[float] = Query(None, ge=0, le=100)
 ):
     query = {}
     if categoria_id:
         query["categoria_id"] = categoria_id
     if ativo is not None:
         query["ativo"] = ativo
+    if preco_min is not None and preco_max is not None and preco_min > preco_max:
+        raise HTTPException(status_code=400, detail="preco_min maior que preco_max")
+    if preco_min is not None or preco_max is not None:
+        query["precoOferta"] = {}
+        if preco_min is not None:
+            query["precoOferta"]["$gte"] = preco_min
+        if preco_max is not None:
+            query["precoOferta"]["$lte"] = preco_max
+    if desconto_min is not None:
+        query["percentualDesconto"] = {"$gte": desconto_min}
     
-    # Sorting options
-    sort_options = {
-        "data_recente": [("dataPostagem", -1)],
-        "maior_desconto": [("percentualDesconto", -1)],
-        "menor_desconto": [("percentualDesconto", 1)],
-        "maior_preco": [("precoOferta", -1)],
-        "menor_preco": [("precoOferta", 1)]
-    }
+    if ordenar_por not in SORT_OPTIONS:
+        ordenar_por = "data_recente"
+    sort_by = SORT_OPTIONS[ordenar_por]
+    filters = dict(query)
+    if cursor:
+        query.update(decode_cursor(cursor, ordenar_por))
+    
+    # Streaming mode returns every match (or up to limite) as NDJSON
+    if stream is not None:
+        if stream != "ndjson":
+            raise HTTPException(status_code=400, detail="Formato de stream inválido")
+        return StreamingResponse(
+            stream_promocoes_ndjson(query, sort_by, limite),
+            media_type="application/x-ndjson"
+        )
+    
+    limite = limite or DEFAULT_PAGE_SIZE
+    if formato not in (None, "card"):
+        raise HTTPException(status_code=400, detail="Formato inválido")
+    
+    # Card mode only reads the card fields (plus the sort key for the cursor)
+    projection = None
+    if formato == "card":
+        projection = dict.fromkeys(CARD_FIELDS + [sort_by[0][0]], 1)
+        projection["_id"] = 0
     
-    sort_by = sort_options.get(ordenar_por, [("dataPostagem", -1)])
+    async def load():
+        # Fetch one extra document to know whether there is a next page
+        headers = {}
+        reader = catalog_reader("promocoes")
+        promocoes = await reader.promocoes.find(query, projection).sort(sort_by).limit(limite + 1).to_list(limite + 1)
+        if len(promocoes) > limite:
+            promocoes = promocoes[:limite]
+            headers["X-Next-Cursor"] = encode_cursor(ordenar_por, promocoes[-1])
+        newest = await reader.promocoes.find_one(filters, {"dataPostagem": 1}, sort=[("dataPostagem", -1)])
+        newest = newest and newest.get("dataPostagem")
+        if formato == "card":
+            # Documents were validated on write and card fields are plain JSON
+            # types, so they are dumped as-is without building models
+            cards = [{field: promo.get(field) for field in CARD_FIELDS} for promo in promocoes]
+            return render_json(cards, plain=True), newest, headers
+        return [Promocao(**promo) for promo in promocoes], newest, headers
     
-    promocoes = await db.promocoes.find(query).sort(sort_by).to_list(100)
-    return [Promocao(**promo) for promo in promocoes]
+    cache_key = catalog_cache_key(
+        "promocoes", categoria_id, ordenar_por, ativo, cursor, limite, formato, preco_min, preco_max, desconto_min
+    )
+    return await cached_catalog_response(request, cache_key, load)
+
+def parse_bulk_rows(body: bytes, content_type: str) -> List[Tuple[int, Any]]:
+    """Split a bulk import body into (row number, raw row) pairs."""
+    text = body.decode("utf-8-sig")
+    if content_type == "application/json":
+        try:
+            rows = json.loads(text)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="JSON inválido")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Envie uma lista de promoções")
+        return list(enumerate(rows, start=1))
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        rows = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append((number, json.loads(line)))
+            except ValueError:
+                rows.append((number, None))
+        return rows
+    if content_type == "text/csv":
+        reader = csv.DictReader(io.StringIO(text))
+        # Empty cells fall back to the model defaults; line 1 is the header
+        return [
+            (number, {key: value for key, value in row.items() if key and value not in (None, "")})
+            for number, row in enumerate(reader, start=2)
+        ]
+    raise HTTPException(status_code=415, detail="Formato não suportado (use JSON, NDJSON ou CSV)")
+
+@api_router.post("/promocoes/bulk")
+async def bulk_create_promocoes(request: Request, current_user: Usuario = Depends(get_current_user)):
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    rows = parse_bulk_rows(await request.body(), content_type)
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Limite de {BULK_MAX_ROWS} promoções por importação excedido"
+        )
+
+    # Validate every row against one preloaded set of categories
+    categoria_ids = set(await db.categorias.distinct("id"))
+    erros = []
+    valid_rows = []
+    for number, row in rows:
+        if not isinstance(row, dict):
+            erros.append({"linha": number, "erro": "Linha inválida"})
+            continue
+        try:
+            promocao = PromocaoCreate(**row)
+        except ValidationError as e:
+            erros.append({"linha": number, "erro": "; ".join(
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+            )})
+            continue
+        if promocao.categoria_id not in categoria_ids:
+            erros.append({"linha": number, "erro": "Categoria não encontrada"})
+            continue
+        valid_rows.append((number, promocao))
+
+    inseridas = 0
+    if valid_rows:
+        discounts = calculate_discount_percentages(
+            np.array([promocao.precoOriginal for _, promocao in valid_rows], dtype=float),
+            np.array([promocao.precoOferta for _, promocao in valid_rows], dtype=float),
+        )
+        documents = [
+            promocao_document(Promocao(**promocao.dict(), percentualDesconto=float(discount)))
+            for (_, promocao), discount in zip(valid_rows, discounts)
+        ]
+
+        for start in range(0, len(documents), BULK_INSERT_CHUNK_SIZE):
+            chunk = documents[start:start + BULK_INSERT_CHUNK_SIZE]
+            try:
+                result = await db.promocoes.insert_many(chunk, ordered=False)
+                inseridas += len(result.inserted_ids)
+            except BulkWriteError as e:
+                inseridas += e.details.get("nInserted", 0)
+                for error in e.details.get("writeErrors", []):
+                    erros.append({"linha": valid_rows[start + error["index"]][0], "erro": error.get("errmsg", "Erro ao inserir")})
+
+        if inseridas:
+            await mark_changed("promocoes")
+            publish_promocao_event("recarregar")
+
+    return {"inseridas": inseridas, "erros": sorted(erros, key=lambda erro: erro["linha"])}
+
+@api_router.patch("/promocoes/bulk")
+async def bulk_update_promocoes(bulk_update: PromocaoBulkUpdate, current_user: Usuario = Depends(get_current_user)):
+    query = {}
+    if bulk_update.ids is not None:
+        query["id"] = {"$in": bulk_update.ids}
+    if bulk_update.categoria_id:
+        query["categoria_id"] = bulk_update.categoria_id
+    if bulk_update.postadas_antes_de:
+        query["dataPostagem"] = {"$lt": bulk_update.postadas_antes_de}
+    if not query:
+        raise HTTPException(status_code=400, detail="Informe ids, categoria_id ou postadas_antes_de")
+
+    update_dict = promocao_changes(bulk_update.alteracoes)
+    if not update_dict:
+        raise HTTPException(status_code=400, detail="Nenhuma alteração informada")
+    if "titulo" in update_dict:
+        update_dict["termosBusca"] = search_terms(update_dict["titulo"])
+    if "categoria_id" in update_dict and not await categoria_exists(update_dict["categoria_id"]):
+        raise HTTPException(status_code=404, detail="Categoria não encontrada")
+
+    result = await db.promocoes.update_many(query, discount_update(update_dict))
+    if result.modified_count:
+        await mark_changed("promocoes")
+        publish_promocao_event("recarregar")
+    return {"encontradas": result.matched_count, "modificadas": result.modified_count}
+
+@api_router.get("/promocoes/search", response_model=List[Promocao])
+async def search_promocoes(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=SEARCH_MAX_QUERY_LENGTH),
+    categoria_id: Optional[str] = None,
+    ativo: Optional[bool] = True,
+    limite: int = Query(20, ge=1, le=MAX_PAGE_SIZE)
+):
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Busca inválida")
+
+    # Every term must prefix a title word: anchored regexes use the index bounds
+    query = {"$and": [{"termosBusca": re.compile("^" + re.escape(term))} for term in terms]}
+    if categoria_id:
+        query["categoria_id"] = categoria_id
+    if ativo is not None:
+        query["ativo"] = ativo
+
+    async def load():
+        # Whole-word matches beat prefix matches; ties go to the bigger discount.
+        # One query per relevance tier (how many of the ranked terms match a whole
+        # word), best first and sorted by the database, until the page is full
+        ranked = terms[:SEARCH_RANKED_TERMS]
+        results = []
+        for whole_words in range(len(ranked), -1, -1):
+            tier = [
+                {"$and": [
+                    {"termosBusca": term} if term in exact else {"termosBusca": {"$ne": term}}
+                    for term in ranked
+                ]}
+                for exact in map(set, combinations(ranked, whole_words))
+            ]
+            remaining = limite - len(results)
+            results += await db.promocoes.find({**query, "$or": tier}).sort(
+                SORT_OPTIONS["maior_desconto"]
+            ).limit(remaining).to_list(remaining)
+            if len(results) >= limite:
+                break
+        newest = max((promo["dataPostagem"] for promo in results if promo.get("dataPostagem")), default=None)
+        return [Promocao(**promo) for promo in results], newest, {}
+
+    cache_key = catalog_cache_key("promocoes", "search", " ".join(terms), categoria_id, ativo, limite)
+    return await cached_catalog_response(request, cache_key, load)
+
+@api_router.get("/promocoes/eventos")
+async def promocoes_eventos(request: Request):
+    last_event_id = request.headers.get("last-event-id")
+    return StreamingResponse(
+        events.subscribe(int(last_event_id) if last_event_id and last_event_id.isdigit() else None),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @api_router.get("/promocoes/{promocao_id}", response_model=Promocao)
 async def get_promocao(promocao_id: str):
@@ -220,8 +2281,7 @@ async def get_promocao(promocao_id: str):
 @api_router.post("/promocoes", response_model=Promocao)
 async def create_promocao(promocao: PromocaoCreate, current_user: Usuario = Depends(get_current_user)):
     # Verify categoria exists
-    categoria = await db.categorias.find_one({"id": promocao.categoria_id})
-    if not categoria:
+    if not await categoria_exists(promocao.categoria_id):
         raise HTTPException(status_code=404, detail="Categoria não encontrada")
     
     promocao_dict = promocao.dict()
@@ -230,7 +2290,9 @@ async def create_promocao(promocao: PromocaoCreate, current_user: Usuario = Depe
     )
     
     promocao_obj = Promocao(**promocao_dict)
-    await db.promocoes.insert_one(promocao_obj.dict())
+    await db.promocoes.insert_one(promocao_document(promocao_obj))
+    await mark_changed("promocoes")
+    publish_promocao_event("criada", promocao_obj.dict())
     return promocao_obj
 
 @api_router.put("/promocoes/{promocao_id}", response_model=Promocao)
@@ -239,26 +2301,55 @@ async def update_promocao(
     promocao_update: PromocaoUpdate, 
     current_user: Usuario = Depends(get_current_user)
 ):
-    existing_promocao = await db.promocoes.find_one({"id": promocao_id})
-    if not existing_promocao:
-        raise HTTPException(status_code=404, detail="Promoção não encontrada")
+    update_dict = promocao_changes(promocao_update)
     
-    update_dict = {k: v for k, v in promocao_update.dict().items() if v is not None}
+    # Verify categoria if being updated
+    if "categoria_id" in update_dict and not await categoria_exists(update_dict["categoria_id"]):
+        raise HTTPException(status_code=404, detail="Categoria não encontrada")
     
-    # Recalculate discount if prices are updated
-    if "precoOriginal" in update_dict or "precoOferta" in update_dict:
-        original_price = update_dict.get("precoOriginal", existing_promocao["precoOriginal"])
-        offer_price = update_dict.get("precoOferta", existing_promocao["precoOferta"])
-        update_dict["percentualDesconto"] = calculate_discount_percentage(original_price, offer_price)
+    if "titulo" in update_dict:
+        update_dict["termosBusca"] = search_terms(update_dict["titulo"])
     
-    # Verify categoria if being updated
-    if "categoria_id" in update_dict:
-        categoria = await db.categorias.find_one({"id": update_dict["categoria_id"]})
-        if not categoria:
-            raise HTTPException(status_code=404, detail="Categoria não encontrada")
+    if not update_dict:
+        updated_promocao = await db.promocoes.find_one({"id": promocao_id})
+    else:
+        # Single atomic round trip; discount_update recalculates the discount if prices change
+        updated_promocao = await db.promocoes.find_one_and_update(
+            {"id": promocao_id},
+            discount_update(update_dict),
+            return_document=ReturnDocument.AFTER
+        )
+    if not updated_promocao:
+        raise HTTPException(status_code=404, detail="Promoção não encontrada")
     
-    await db.promocoes.update_one({"id": promocao_id}, {"$set": update_dict})
-    updated_promocao = await db.promocoes.find_one({"id": promocao_id})
+    if update_dict:
+        await mark_changed("promocoes")
+        publish_promocao_event("atualizada", updated_promocao)
+    return Promocao(**updated_promocao)
+
+@api_router.post("/promocoes/{promocao_id}/imagem", response_model=Promocao)
+async def ingest_promocao_imagem(
+    promocao_id: str,
+    arquivo: Optional[UploadFile] = File(None),
+    url: Optional[str] = None,
+    current_user: Usuario = Depends(get_current_user)
+):
+    # Without a file or url, the promotion's current remote image is ingested
+    promocao = await db.promocoes.find_one({"id": promocao_id}, {"imagemProduto": 1})
+    if not promocao:
+        raise HTTPException(status_code=404, detail="Promoção não encontrada")
+    miniaturas = await ingest_image(await read_image_source(arquivo, url or promocao["imagemProduto"]))
+    
+    updated_promocao = await db.promocoes.find_one_and_update(
+        {"id": promocao_id},
+        {"$set": {"imagemProduto": listing_image(miniaturas), "miniaturas": miniaturas}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_promocao:
+        raise HTTPException(status_code=404, detail="Promoção não encontrada")
+    
+    await mark_changed("promocoes")
+    publish_promocao_event("atualizada", updated_promocao)
     return Promocao(**updated_promocao)
 
 @api_router.delete("/promocoes/{promocao_id}")
@@ -266,19 +2357,55 @@ async def delete_promocao(promocao_id: str, current_user: Usuario = Depends(get_
     result = await db.promocoes.delete_one({"id": promocao_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Promoção não encontrada")
+    await mark_changed("promocoes")
+    publish_promocao_event("removida", promocao_id=promocao_id)
     return {"message": "Promoção removida com sucesso"}
 
+# Images
+@api_router.post("/imagens")
+async def upload_imagem(
+    arquivo: Optional[UploadFile] = File(None),
+    url: Optional[str] = None,
+    current_user: Usuario = Depends(get_current_user)
+):
+    # For new promotions: send the result as imagemProduto/miniaturas on create
+    miniaturas = await ingest_image(await read_image_source(arquivo, url))
+    return {"imagemProduto": listing_image(miniaturas), "miniaturas": miniaturas}
+
+@api_router.get("/imagens/{nome}")
+async def get_imagem(nome: str):
+    path = IMAGES_DIR / nome[:2] / nome
+    if not IMAGE_NAME.match(nome) or not path.is_file():
+        raise HTTPException(status_code=404, detail="Imagem não encontrada")
+    # Content-addressed: a name always refers to the same bytes
+    return FileResponse(path, media_type="image/webp", headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+# Stats Routes
+@api_router.get("/stats")
+async def get_stats(request: Request):
+    async def load():
+        stats = await db.estatisticas.find_one({"_id": "catalogo"}, {"_id": 0})
+        if stats is None:
+            # First run, before the refresher has materialized anything
+            stats = await refresh_catalog_stats()
+        return stats, stats.get("atualizadoEm"), {}
+
+    return await cached_catalog_response(request, catalog_cache_key("estatisticas"), load)
+
 # Config Routes
 @api_router.get("/config/links")
-async def get_social_links():
-    config = await db.config.find_one({"type": "social_links"})
-    if not config:
-        # Default links
-        return {
-            "whatsapp": "https://wa.me/",
-            "telegram": "https://t.me/"
-        }
-    return config["links"]
+async def get_social_links(request: Request):
+    async def load():
+        config = await db.config.find_one({"type": "social_links"})
+        if not config:
+            # Default links
+            return {
+                "whatsapp": "https://wa.me/",
+                "telegram": "https://t.me/"
+            }, None, {}
+        return config["links"], None, {}
+
+    return await cached_catalog_response(request, catalog_cache_key("config", "social_links"), load)
 
 @api_router.put("/config/links")
 async def update_social_links(links: dict, current_user: Usuario = Depends(get_current_user)):
@@ -287,8 +2414,94 @@ async def update_social_links(links: dict, current_user: Usuario = Depends(get_c
         {"$set": {"links": links}},
         upsert=True
     )
+    await mark_changed("config")
     return {"message": "Links atualizados com sucesso"}
 
+# Diagnostic Routes
+@api_router.get("/diagnostics/indexes")
+async def get_index_diagnostics(current_user: Usuario = Depends(get_current_user)):
+    indexes = {}
+    for collection in INDEXES:
+        indexes[collection] = sorted((await db[collection].index_information()).keys())
+
+    # Explain (with execution stats) every listing query shape served by get_promocoes
+    plans = []
+    for ordenar_por, sort_by in SORT_OPTIONS.items():
+        for query in (
+            {"ativo": True},
+            {"categoria_id": "", "ativo": True},
+            {},
+            {"ativo": True, "precoOferta": {"$lte": 100.0}},
+            {"ativo": True, "percentualDesconto": {"$gte": 40.0}},
+            {"ativo": True, "precoOferta": {"$gte": 50.0, "$lte": 500.0}, "percentualDesconto": {"$gte": 20.0}},
+            {"categoria_id": "", "ativo": True, "percentualDesconto": {"$gte": 40.0}},
+        ):
+            explain = await db.promocoes.find(query).sort(sort_by).limit(DEFAULT_PAGE_SIZE).explain()
+            stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+            execution = explain.get("executionStats", {})
+            returned = execution.get("nReturned", 0)
+            docs_examined = execution.get("totalDocsExamined", 0)
+            plans.append({
+                "ordenar_por": ordenar_por,
+                "filtros": sorted(query.keys()),
+                "estagios": stages,
+                "collscan": "COLLSCAN" in stages,
+                "nReturned": returned,
+                "totalKeysExamined": execution.get("totalKeysExamined", 0),
+                "totalDocsExamined": docs_examined,
+                # Documents fetched only to be filtered out: the filter isn't served by the index
+                "scan": docs_examined > returned,
+            })
+
+    return {
+        "indexes": indexes,
+        "planos": plans,
+        "collscan": any(plan["collscan"] for plan in plans),
+        "scan": any(plan["scan"] for plan in plans),
+    }
+
+@api_router.get("/diagnostics/cache")
+async def get_cache_diagnostics(current_user: Usuario = Depends(get_current_user)):
+    return {
+        "responses": response_cache.stats(),
+        "tokens": token_cache.stats(),
+        "users": user_cache.stats(),
+        "coalescing": catalog_loads.stats(),
+        "shared": cache_backend.stats(),
+    }
+
+@api_router.get("/diagnostics/bcrypt")
+async def get_bcrypt_diagnostics(current_user: Usuario = Depends(get_current_user)):
+    return password_pool.stats()
+
+@api_router.get("/diagnostics/events")
+async def get_event_diagnostics(current_user: Usuario = Depends(get_current_user)):
+    return events.stats()
+
+@api_router.get("/diagnostics/mongodb")
+async def get_mongodb_diagnostics(current_user: Usuario = Depends(get_current_user)):
+    pool_options = client.options.pool_options
+    return {
+        "pool": mongodb_pool.stats(pool_options.max_pool_size),
+        "commands": mongodb_recent_latency.summary(),
+        "config": {
+            "max_pool_size": pool_options.max_pool_size,
+            "min_pool_size": pool_options.min_pool_size,
+            "max_idle_time_seconds": pool_options.max_idle_time_seconds,
+            "wait_queue_timeout": pool_options.wait_queue_timeout,
+            "connect_timeout": pool_options.connect_timeout,
+            "socket_timeout": pool_options.socket_timeout,
+            "server_selection_timeout": client.options.server_selection_timeout,
+            "compressors": mongo_client_options().get("compressors", []),
+            "catalog_read_preference": catalog_db.read_preference.mongos_mode,
+            "primary_after_write_seconds": MONGO_PRIMARY_AFTER_WRITE_SECONDS,
+        },
+    }
+
+@api_router.get("/diagnostics/jobs")
+async def get_job_diagnostics(current_user: Usuario = Depends(get_current_user)):
+    return scheduler.stats()
+
 # Basic Routes
 @api_router.get("/")
 async def root():
@@ -298,21 +2511,83 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now(timezone.utc)}
 
+@api_router.get("/health/live")
+async def liveness_check():
+    # The process is up and the event loop answers; dependencies are not checked
+    return {"status": "alive", "timestamp": datetime.now(timezone.utc)}
+
+# Last readiness probe, reused for READINESS_CACHE_SECONDS so that frequent
+# load balancer checks don't add load to MongoDB
+_readiness = {"checked_at": 0.0, "result": None}
+_readiness_lock = asyncio.Lock()
+
+async def probe_readiness() -> dict:
+    started = time.perf_counter()
+    mongodb = {"ok": True, "error": None}
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout=READINESS_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        mongodb = {"ok": False, "error": f"ping timed out after {READINESS_TIMEOUT_SECONDS}s"}
+    except Exception as e:
+        mongodb = {"ok": False, "error": str(e)}
+    mongodb["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    return {
+        "status": "ready" if mongodb["ok"] else "not_ready",
+        "mongodb": mongodb,
+        "pool": mongodb_pool.stats(client.options.pool_options.max_pool_size),
+        "queries": mongodb_recent_latency.summary(),
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+@api_router.get("/health/ready")
+async def readiness_check(response: Response):
+    async with _readiness_lock:
+        if _readiness["result"] is None or time.monotonic() - _readiness["checked_at"] >= READINESS_CACHE_SECONDS:
+            _readiness["result"] = await probe_readiness()
+            _readiness["checked_at"] = time.monotonic()
+    result = _readiness["result"]
+    if result["status"] != "ready":
+        response.status_code = 503
+    return result
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
+    await cache_backend.start()
+    await ensure_indexes()
     await create_admin_user()
+    # Backfill in the background so a large collection doesn't hold up startup
+    app.state.background_tasks = [
+        asyncio.create_task(backfill_search_terms()),
+        asyncio.create_task(cache_backend.listen()),
+    ]
+    if PROMOCOES_CHANGE_STREAM:
+        app.state.background_tasks.append(asyncio.create_task(watch_promocoes_changes()))
+    if SNAPSHOT_DIR:
+        # First export shortly after startup, then after writes
+        snapshot_dirty.set()
+    scheduler.start()
     
     # Create default categories if they don't exist
     existing_categories = await db.categorias.count_documents({})
@@ -329,6 +2604,7 @@ async def startup_event():
         for cat in default_categories:
             categoria_obj = Categoria(**cat)
             await db.categorias.insert_one(categoria_obj.dict())
+        await mark_changed("categorias")
         
         print("Default categories created")
 
@@ -341,4 +2617,10 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    scheduler.stop()
+    for task in getattr(app.state, "background_tasks", []):
+        task.cancel()
+    client.close()
+    await cache_backend.close()
+    password_pool.executor.shutdown(wait=False)
+    image_pool.shutdown(wait=False)
\ No newline at end of file
@@ -0,0 +1,209 @@
+import requests
+import os
+import sys
+import time
+import timeit
+import uuid
+from datetime import datetime, timezone
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class OfertasPITBenchmark:
+    def __init__(self, base_url="http://localhost:8001"):
+        self.base_url = base_url
+        self.api_url = f"{base_url}/api"
+        self.admin_email = "luiz.ribeiro@ofertas.pit"
+        self.admin_password = "secure"
+
+    @staticmethod
+    def percentile(samples, fraction):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def report(self, name, samples):
+        print(f"   {name}: {len(samples)} requests, "
+              f"p50={self.percentile(samples, 0.5) * 1000:.1f}ms "
+              f"p99={self.percentile(samples, 0.99) * 1000:.1f}ms")
+
+    def timed_get(self, session, endpoint):
+        started = time.perf_counter()
+        session.get(f"{self.api_url}/{endpoint}", timeout=30)
+        return time.perf_counter() - started
+
+    def catalog_latencies(self, duration, stop=None):
+        """Poll the catalog sequentially for `duration` seconds (or until `stop` is set)"""
+        samples = []
+        session = requests.Session()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline and not (stop and stop.is_set()):
+            samples.append(self.timed_get(session, "promocoes?ordenar_por=maior_desconto"))
+        return samples
+
+    def login(self):
+        response = requests.post(
+            f"{self.api_url}/auth/login",
+            json={"email": self.admin_email, "senha": self.admin_password},
+            timeout=60
+        )
+        return response.status_code
+
+    def auth_headers(self):
+        response = requests.post(
+            f"{self.api_url}/auth/login",
+            json={"email": self.admin_email, "senha": self.admin_password},
+            timeout=60
+        )
+        return {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+    def bench_login_storm(self, duration=5.0, concurrent_logins=32):
+        """Catalog p99 latency alone vs. during a concurrent login storm"""
+        print(f"\n⏱️  Login storm ({concurrent_logins} concurrent logins, {duration}s)")
+        self.report("catalog (idle)", self.catalog_latencies(duration))
+
+        stop = threading.Event()
+        statuses = []
+
+        def storm():
+            while not stop.is_set():
+                statuses.append(self.login())
+
+        with ThreadPoolExecutor(max_workers=concurrent_logins) as pool:
+            for _ in range(concurrent_logins):
+                pool.submit(storm)
+            samples = self.catalog_latencies(duration)
+            stop.set()
+
+        self.report("catalog (login storm)", samples)
+        print(f"   logins: {statuses.count(200)} ok, {statuses.count(503)} rejected (503)")
+
+    def bench_sequential_updates(self, count=10000):
+        """Per-request cost of authenticated writes (run once with AUTH_CACHE_TTL_SECONDS=0 to compare)"""
+        print(f"\n⏱️  {count} sequential update_promocao calls")
+        promocoes = requests.get(f"{self.api_url}/promocoes?limite=1", timeout=30).json()
+        if not promocoes:
+            print("   ❌ No promotions to update")
+            return
+        promocao_id = promocoes[0]['id']
+
+        session = requests.Session()
+        session.headers.update(self.auth_headers())
+        samples = []
+        for _ in range(count):
+            started = time.perf_counter()
+            session.put(f"{self.api_url}/promocoes/{promocao_id}", json={"ativo": True}, timeout=30)
+            samples.append(time.perf_counter() - started)
+
+        self.report("update_promocao", samples)
+        print(f"   mean={sum(samples) / len(samples) * 1000:.2f}ms per request")
+
+    @staticmethod
+    def load_server():
+        """Import backend/server.py in-process for serialization microbenchmarks (no database access)"""
+        os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+        os.environ.setdefault('DB_NAME', 'benchmark')
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+        import server
+        return server
+
+    @staticmethod
+    def sample_documents(count):
+        return [{
+            "_id": uuid.uuid4().hex[:24],
+            "id": str(uuid.uuid4()),
+            "titulo": f"Smartphone Eletrônico Oferta {i}",
+            "imagemProduto": f"https://images.example.com/produtos/{uuid.uuid4()}/original.jpg",
+            "precoOriginal": 1999.9 + i,
+            "precoOferta": 1499.9 + i,
+            "percentualDesconto": 25.0,
+            "linkOferta": f"https://loja.example.com/oferta/{uuid.uuid4()}?utm_source=ofertas-pit",
+            "categoria_id": str(uuid.uuid4()),
+            "dataPostagem": datetime.now(timezone.utc),
+            "ativo": True,
+        } for i in range(count)]
+
+    def bench_listing_serialization(self, count=100, repeat=200):
+        """Serialization cost per listing: response_model path vs. current full and card modes"""
+        from typing import List
+        from fastapi.encoders import jsonable_encoder
+        from pydantic import TypeAdapter
+        import json
+
+        server = self.load_server()
+        documents = self.sample_documents(count)
+        response_model = TypeAdapter(List[server.Promocao])
+
+        def response_model_path():
+            # Promocao(**promo) in the route, then response_model validation + JSONResponse
+            validated = response_model.validate_python([server.Promocao(**promo) for promo in documents])
+            json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":"))
+
+        def full_mode():
+            server.render_json([server.Promocao(**promo) for promo in documents])
+
+        def card_mode():
+            cards = [{field: promo.get(field) for field in server.CARD_FIELDS} for promo in documents]
+            server.render_json(cards, plain=True)
+
+        print(f"\n⏱️  Listing serialization ({count} items)")
+        for name, func in (("response_model", response_model_path), ("full", full_mode), ("card", card_mode)):
+            per_call = min(timeit.repeat(func, number=repeat, repeat=3)) / repeat
+            print(f"   {name}: {per_call * 1000:.3f}ms per listing")
+
+    def bench_compression(self, count=100, repeat=50):
+        """Bytes on the wire per encoding, and the CPU a cache miss spends compressing"""
+        print(f"\n⏱️  Compression of /promocoes?limite={count}")
+        for accept_encoding in ("identity", "gzip", "br"):
+            response = requests.get(
+                f"{self.api_url}/promocoes?limite={count}",
+                headers={'Accept-Encoding': accept_encoding},
+                stream=True,
+                timeout=30
+            )
+            wire_bytes = len(response.raw.read(decode_content=False))
+            print(f"   {accept_encoding}: {wire_bytes} bytes on the wire "
+                  f"(Content-Encoding: {response.headers.get('Content-Encoding', 'none')})")
+
+        server = self.load_server()
+        body = server.render_json([server.Promocao(**promo) for promo in self.sample_documents(count)])
+        print(f"   sample listing: {len(body)} bytes uncompressed")
+        for encoding in ("gzip", "br"):
+            for fast in (True, False):
+                per_call = min(timeit.repeat(lambda: server.compress_body(body, encoding, fast), number=repeat, repeat=3)) / repeat
+                size = len(server.compress_body(body, encoding, fast))
+                label = "on the fly" if fast else "cache fill"
+                print(f"   {encoding} ({label}): {per_call * 1000:.3f}ms CPU, {size} bytes; cache hits: 0ms")
+
+    def bench_json_serialization(self, sizes=(10, 100, 1000), repeat=50):
+        """Per-request serialization time of full listings: stdlib json vs. orjson (FAST_JSON)"""
+        server = self.load_server()
+        fast_json = server.FAST_JSON
+        print(f"\n⏱️  JSON serialization (stdlib vs orjson)")
+        try:
+            for count in sizes:
+                promocoes = [server.Promocao(**promo) for promo in self.sample_documents(count)]
+                timings = {}
+                for name, enabled in (("stdlib", False), ("orjson", True)):
+                    server.FAST_JSON = enabled
+                    timings[name] = min(timeit.repeat(lambda: server.render_json(promocoes), number=repeat, repeat=3)) / repeat
+                print(f"   {count} items: stdlib {timings['stdlib'] * 1000:.3f}ms, "
+                      f"orjson {timings['orjson'] * 1000:.3f}ms "
+                      f"({timings['stdlib'] / timings['orjson']:.1f}x)")
+        finally:
+            server.FAST_JSON = fast_json
+
+def main():
+    print("🚀 Starting Ofertas do PIT API Benchmarks")
+    print("=" * 50)
+
+    benchmark = OfertasPITBenchmark(*sys.argv[1:2])
+    benchmark.bench_listing_serialization()
+    benchmark.bench_compression()
+    benchmark.bench_json_serialization()
+    benchmark.bench_login_storm()
+    benchmark.bench_sequential_updates()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -73,6 +73,29 @@ class OfertasPITAPITester:
         )
         return success
 
+    def test_liveness_and_readiness(self):
+        """Test liveness and readiness probes"""
+        success, _ = self.run_test(
+            "Liveness Probe",
+            "GET",
+            "health/live",
+            200
+        )
+        ready, response = self.run_test(
+            "Readiness Probe",
+            "GET",
+            "health/ready",
+            200
+        )
+        if ready:
+            for key in ("mongodb", "pool", "queries"):
+                if key not in response:
+                    print(f"❌ Readiness response missing '{key}'")
+                    return False
+            print(f"   MongoDB ping: {response['mongodb']['latency_ms']}ms, "
+                  f"pool saturation: {response['pool']['saturation']}")
+        return success and ready
+
     def test_admin_login(self):
         """Test admin login and get token"""
         success, response = self.run_test(
@@ -145,8 +168,116 @@ class OfertasPITAPITester:
             200
         )
         
+        # Test price and discount ranges
+        success3, response3 = self.run_test(
+            "Get Promotions (Under R$100, 40%+ off)",
+            "GET",
+            "promocoes?ordenar_por=menor_preco&preco_max=100&desconto_min=40",
+            200
+        )
+        if success3:
+            out_of_range = [promo for promo in response3
+                            if promo.get('precoOferta', 0) > 100 or promo.get('percentualDesconto', 0) < 40]
+            if out_of_range:
+                print(f"   ❌ {len(out_of_range)} promotions outside the requested ranges")
+                success3 = False
+        
+        return success1 and success2 and success3
+
+    def test_promocoes_pagination(self):
+        """Test keyset pagination of promotions"""
+        success, first_page = self.run_test(
+            "Get Promotions (First Page)",
+            "GET",
+            "promocoes?ordenar_por=maior_desconto&limite=2",
+            200
+        )
+        if not success:
+            return False
+
+        response = requests.get(f"{self.api_url}/promocoes?ordenar_por=maior_desconto&limite=2", timeout=10)
+        next_cursor = response.headers.get('X-Next-Cursor')
+        if not next_cursor:
+            print(f"   Only one page available ({len(first_page)} promotions)")
+            return True
+
+        success, second_page = self.run_test(
+            "Get Promotions (Second Page)",
+            "GET",
+            f"promocoes?ordenar_por=maior_desconto&limite=2&cursor={next_cursor}",
+            200
+        )
+        if success:
+            first_ids = {promo.get('id') for promo in first_page}
+            repeated = [promo for promo in second_page if promo.get('id') in first_ids]
+            if repeated:
+                print(f"   ❌ Second page repeats {len(repeated)} promotions")
+                return False
+            print(f"   ✅ Second page has {len(second_page)} new promotions")
+        return success
+
+    def test_conditional_requests(self):
+        """Test ETag revalidation of catalog endpoints"""
+        self.tests_run += 1
+        print(f"\n🔍 Testing Conditional Requests (ETag)...")
+        try:
+            all_passed = True
+            for endpoint in ("promocoes", "categorias"):
+                response = requests.get(f"{self.api_url}/{endpoint}", timeout=10)
+                etag = response.headers.get('ETag')
+                if not etag or not response.headers.get('Last-Modified'):
+                    print(f"   ❌ {endpoint}: missing ETag/Last-Modified")
+                    all_passed = False
+                    continue
+                revalidated = requests.get(
+                    f"{self.api_url}/{endpoint}", headers={'If-None-Match': etag}, timeout=10
+                )
+                if revalidated.status_code == 304:
+                    print(f"   ✅ {endpoint}: 304 for ETag {etag}")
+                else:
+                    print(f"   ❌ {endpoint}: expected 304, got {revalidated.status_code}")
+                    all_passed = False
+            if all_passed:
+                self.tests_passed += 1
+                print(f"✅ Passed")
+            return all_passed
+        except Exception as e:
+            print(f"❌ Failed - Error: {str(e)}")
+            return False
+
+    def test_search_promocoes(self):
+        """Test accent-insensitive prefix search"""
+        success1, response1 = self.run_test(
+            "Search Promotions (Prefix)",
+            "GET",
+            "promocoes/search?q=eletr",
+            200
+        )
+        success2, response2 = self.run_test(
+            "Search Promotions (Accented)",
+            "GET",
+            "promocoes/search?q=eletrônico",
+            200
+        )
+        if success1 and success2:
+            print(f"   Found {len(response1)} for 'eletr', {len(response2)} for 'eletrônico'")
         return success1 and success2
 
+    def test_stats(self):
+        """Test catalog statistics"""
+        success, response = self.run_test(
+            "Get Catalog Stats",
+            "GET",
+            "stats",
+            200
+        )
+        if success:
+            print(f"   Active promotions: {response.get('total', 0)}")
+            for entry in response.get('categorias', [])[:3]:
+                print(f"   - {entry.get('categoria_id')}: {entry.get('total', 0)} "
+                      f"(max {entry.get('descontoMaximo', 0)}% off)")
+        return success
+
     def test_social_links(self):
         """Test social links configuration"""
         success, response = self.run_test(
@@ -188,6 +319,55 @@ class OfertasPITAPITester:
 
         return success1 and success2
 
+    def test_bulk_import_validation(self):
+        """Test per-row errors of the bulk import (no row is valid, nothing is written)"""
+        if not self.token:
+            print("❌ No token available for authenticated tests")
+            return False
+
+        success, response = self.run_test(
+            "Bulk Import (Invalid Rows)",
+            "POST",
+            "promocoes/bulk",
+            200,
+            data=[
+                {"titulo": "Sem categoria", "imagemProduto": "https://example.com/a.png",
+                 "precoOriginal": 100, "precoOferta": 80, "linkOferta": "https://example.com",
+                 "categoria_id": "categoria-inexistente"},
+                {"titulo": "Incompleta"}
+            ],
+            auth_required=True
+        )
+        if success:
+            if response.get('inseridas') == 0 and len(response.get('erros', [])) == 2:
+                print(f"   ✅ Both rows rejected: {[erro['linha'] for erro in response['erros']]}")
+            else:
+                print(f"   ❌ Unexpected result: {response}")
+                return False
+        return success
+
+    def test_image_url_validation(self):
+        """Test that image ingestion refuses non-public URLs"""
+        if not self.token:
+            print("❌ No token available for authenticated tests")
+            return False
+
+        private, _ = self.run_test(
+            "Image Ingestion (Private URL)",
+            "POST",
+            "imagens?url=http://127.0.0.1/imagem.png",
+            400,
+            auth_required=True
+        )
+        scheme, _ = self.run_test(
+            "Image Ingestion (File URL)",
+            "POST",
+            "imagens?url=file:///etc/passwd",
+            400,
+            auth_required=True
+        )
+        return private and scheme
+
     def test_root_endpoint(self):
         """Test root API endpoint"""
         success, response = self.run_test(
@@ -211,6 +391,7 @@ def main():
     
     tester.test_root_endpoint()
     tester.test_health_check()
+    tester.test_liveness_and_readiness()
     
     # Test public endpoints
     print("\n📋 PUBLIC ENDPOINTS")
@@ -219,6 +400,10 @@ def main():
     tester.test_get_categorias()
     tester.test_get_promocoes()
     tester.test_get_promocoes_with_filters()
+    tester.test_promocoes_pagination()
+    tester.test_conditional_requests()
+    tester.test_search_promocoes()
+    tester.test_stats()
     tester.test_social_links()
     
     # Test authentication
@@ -232,6 +417,8 @@ def main():
         print("\n📋 AUTHENTICATED ENDPOINTS")
         print("-" * 30)
         tester.test_authenticated_endpoints()
+        tester.test_bulk_import_validation()
+        tester.test_image_url_validation()
     else:
         print("❌ Skipping authenticated tests due to login failure")
 
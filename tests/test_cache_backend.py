@@ -0,0 +1,153 @@
+"""Shared cache backend (CACHE_BACKEND=redis) against fakeredis as the Redis stand-in."""
+import asyncio
+import os
+import sys
+
+import fakeredis
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_cache_backend")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    fake = fakeredis.FakeServer()
+    monkeypatch.setattr(server, "cache_backend", make_backend(fake))
+    monkeypatch.setattr(server, "collection_versions", {name: 0 for name in server.collection_versions})
+    server.response_cache._entries.clear()
+    server.user_cache._entries.clear()
+    return fake
+
+
+def make_backend(fake):
+    return server.RedisCacheBackend(fakeredis.aioredis.FakeRedis(server=fake), "teste")
+
+
+def cache_listing():
+    key = server.catalog_cache_key("promocoes", "listagem")
+    server.response_cache.set(key, server.CachedBody(b"[]", {"ETag": '"x"'}))
+    return key
+
+
+def test_entries_are_shared_between_workers(redis_server):
+    async def scenario():
+        other = make_backend(redis_server)
+        cached = server.CachedBody(b'[{"id":"1"}]', {"ETag": '"abc"', "X-Next-Cursor": "c"})
+        await server.cache_backend.set("promocoes:1:abc", cached.to_bytes(), 30)
+        shared = server.CachedBody.from_bytes(await other.get("promocoes:1:abc"))
+        assert shared.body == cached.body
+        assert shared.headers == cached.headers
+        assert await other.get("promocoes:1:outra") is None
+
+    asyncio.run(scenario())
+
+
+def test_start_on_empty_redis(redis_server):
+    asyncio.run(server.cache_backend.start())
+    assert server.collection_versions["promocoes"] == 0
+    assert server.cache_backend.errors == 0
+
+
+def test_write_from_another_worker_invalidates(redis_server):
+    async def scenario():
+        listener = asyncio.create_task(server.cache_backend.listen())
+        await asyncio.sleep(0.05)
+        key = cache_listing()
+
+        other = make_backend(redis_server)
+        version = await other.next_version("promocoes")
+        await other.publish({
+            "type": "colecao", "namespace": "promocoes", "version": version,
+            "changed_at": "2026-01-01T00:00:00+00:00",
+        })
+        await asyncio.sleep(0.1)
+        listener.cancel()
+
+        assert server.collection_versions["promocoes"] == version
+        assert server.response_cache.get(key) is None
+
+    asyncio.run(scenario())
+
+
+def test_writes_after_an_outage_are_not_ignored(redis_server):
+    async def scenario():
+        await server.mark_changed("promocoes")
+        assert server.collection_versions["promocoes"] == 1
+
+        # Write while Redis is unreachable: local counter only
+        redis_server.connected = False
+        await server.mark_changed("promocoes")
+        assert server.collection_versions["promocoes"] == 2
+        redis_server.connected = True
+
+        # INCR alone would return 2 here and the write would be dropped
+        key = cache_listing()
+        await server.mark_changed("promocoes")
+        assert server.collection_versions["promocoes"] == 3
+        assert server.response_cache.get(key) is None
+        assert int(await server.cache_backend.redis.get("teste:versao:promocoes")) == 3
+
+    asyncio.run(scenario())
+
+
+def test_writes_after_a_flush_are_not_ignored(redis_server):
+    async def scenario():
+        for _ in range(3):
+            await server.mark_changed("categorias")
+        await server.cache_backend.redis.flushall()
+
+        key = server.catalog_cache_key("categorias")
+        server.response_cache.set(key, server.CachedBody(b"[]", {"ETag": '"x"'}))
+        await server.mark_changed("categorias")
+        assert server.collection_versions["categorias"] == 4
+        assert server.response_cache.get(key) is None
+
+    asyncio.run(scenario())
+
+
+def test_sync_pushes_versions_taken_during_an_outage(redis_server):
+    async def scenario():
+        redis_server.connected = False
+        await server.mark_changed("config")
+        await server.mark_changed("config")
+        redis_server.connected = True
+
+        other = make_backend(redis_server)
+        pubsub = other.redis.pubsub()
+        await pubsub.subscribe(other.channel)
+        await server.cache_backend.sync()
+
+        assert int(await other.redis.get("teste:versao:config")) == 2
+        message = None
+        for _ in range(10):
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.1)
+            if message:
+                break
+        assert message is not None and b'"version": 2' in message["data"]
+        # The next write from any worker is newer than every local version
+        assert await other.next_version("config") == 3
+
+    asyncio.run(scenario())
+
+
+def test_user_invalidation_reaches_other_workers(redis_server):
+    async def scenario():
+        listener = asyncio.create_task(server.cache_backend.listen())
+        await asyncio.sleep(0.05)
+        server.user_cache.set(("usuario", "u1"), object())
+        await server.cache_backend.set("usuario:u1", b"{}", 60)
+
+        other = make_backend(redis_server)
+        await other.delete("usuario:u1")
+        await other.publish({"type": "usuario", "id": "u1"})
+        await asyncio.sleep(0.1)
+        listener.cancel()
+
+        assert server.user_cache.get(("usuario", "u1")) is None
+        assert await other.get("usuario:u1") is None
+
+    asyncio.run(scenario())
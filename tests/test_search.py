@@ -0,0 +1,65 @@
+"""GET /api/promocoes/search against an in-memory MongoDB stand-in."""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_search")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    database = AsyncMongoMockClient()["test_search"]
+    for name in ("db", "catalog_db"):
+        monkeypatch.setattr(server, name, database)
+    server.response_cache._entries.clear()
+    titles = {
+        "1": ("Fone bluetooth sem fio", 10),
+        "2": ("Fone bluetooth sem fio com cancelamento de ruido", 20),
+        "3": ("Fones bluetoothx", 50),
+    }
+    asyncio.run(database.promocoes.insert_many([
+        server.promocao_document(server.Promocao(
+            id=promo_id, titulo=titulo, imagemProduto="x", precoOriginal=100, precoOferta=100 - desconto,
+            percentualDesconto=desconto, linkOferta="l", categoria_id="c",
+        ))
+        for promo_id, (titulo, desconto) in titles.items()
+    ]))
+    return TestClient(server.app)
+
+
+def test_whole_words_rank_before_prefixes(client):
+    response = client.get("/api/promocoes/search", params={"q": "fone bluetooth"})
+    assert [promo["id"] for promo in response.json()] == ["2", "1", "3"]
+
+
+def test_long_multi_word_query(client, monkeypatch):
+    finds = []
+    collection = type(server.db.promocoes)
+    find = collection.find
+    monkeypatch.setattr(collection, "find", lambda self, query, *args: finds.append(query) or find(self, query, *args))
+
+    words = "fone bluetooth sem fio com cancelamento de ruido a b c d e f g h i j"
+    started = time.monotonic()
+    response = client.get("/api/promocoes/search", params={"q": words})
+    assert response.status_code == 200
+    assert time.monotonic() - started < 1
+    # Only the first terms are ranked: at most 2^SEARCH_RANKED_TERMS clauses in all
+    assert finds and sum(len(query["$or"]) for query in finds) <= 2 ** server.SEARCH_RANKED_TERMS
+    assert response.json() == []
+
+    words = "fone bluetooth sem fio com cancelamento de ruido"
+    assert [promo["id"] for promo in client.get("/api/promocoes/search", params={"q": words}).json()] == ["2"]
+
+
+def test_query_length_is_limited(client):
+    q = "a " * server.SEARCH_MAX_QUERY_LENGTH
+    assert client.get("/api/promocoes/search", params={"q": q}).status_code == 422
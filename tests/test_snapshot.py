@@ -0,0 +1,39 @@
+"""Static catalog snapshot written by several workers into one directory."""
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_snapshot")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import server  # noqa: E402
+
+
+def bodies_for(worker):
+    return {f"/api/promocoes?ordenar_por=opcao{i}": b'[{"worker":%d}]' % worker for i in range(10)}
+
+
+def test_concurrent_exports_keep_the_newest_render(tmp_path):
+    start = datetime.now(timezone.utc)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda worker: server.write_snapshot(
+            tmp_path, bodies_for(worker), start + timedelta(seconds=worker)), range(16)))
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest["geradoEm"] == (start + timedelta(seconds=15)).isoformat()
+    for entry in manifest["arquivos"].values():
+        for key in ("arquivo", "gzip", "br"):
+            assert (tmp_path / entry[key]).exists()
+        assert (tmp_path / entry["arquivo"]).read_bytes() == b'[{"worker":15}]'
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_older_render_does_not_replace_the_snapshot(tmp_path):
+    now = datetime.now(timezone.utc)
+    assert server.write_snapshot(tmp_path, bodies_for(1), now) > 0
+    assert server.write_snapshot(tmp_path, bodies_for(0), now - timedelta(seconds=1)) == 0
+    entry = next(iter(json.loads((tmp_path / "manifest.json").read_text())["arquivos"].values()))
+    assert (tmp_path / entry["arquivo"]).read_bytes() == b'[{"worker":1}]'